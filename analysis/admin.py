@@ -1,10 +1,203 @@
 from django.contrib import admin
-from .models import Plan, Invoice, Function, Question, Answer, Assessment
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import (
+    Plan,
+    Invoice,
+    Function,
+    Question,
+    Answer,
+    Assessment,
+    DailyPlanStats,
+    RequestProfile,
+    Respondent,
+    ScoringModel,
+)
+from .choices import PLAN_BITS, PLAN_CHOICES
+from .dashboard import median_completion_range
+from .search import get_question_index
 
 # Register your models here.
 admin.site.register(Plan)
-admin.site.register(Invoice)
 admin.site.register(Function)
-admin.site.register(Question)
 admin.site.register(Answer)
 admin.site.register(Assessment)
+admin.site.register(Respondent)
+
+
+class InvoiceAdmin(admin.ModelAdmin):
+    def get_readonly_fields(self, request, obj=None):
+        # Answers, counters and cached lookups are tied to the invoice's plan.
+        if obj is not None:
+            return ("plan",)
+        return ()
+
+
+admin.site.register(Invoice, InvoiceAdmin)
+
+
+class QuestionPlanFilter(admin.SimpleListFilter):
+    """Plan filter on plan_mask, without joining the plan table."""
+
+    title = "plan"
+    parameter_name = "plan"
+
+    def lookups(self, request, model_admin):
+        return PLAN_CHOICES
+
+    def queryset(self, request, queryset):
+        if self.value() in PLAN_BITS:
+            return queryset.for_plan(self.value())
+        return queryset
+
+
+class QuestionAdmin(admin.ModelAdmin):
+    list_display = ("id", "en", "function", "priority")
+    list_filter = (QuestionPlanFilter, "function")
+    search_fields = ("az", "en", "ru")
+
+    def get_search_results(self, request, queryset, search_term):
+        # Served from the in-memory index instead of __icontains scans.
+        if not search_term:
+            return queryset, False
+        return queryset.filter(id__in=get_question_index().search(search_term)), False
+
+
+admin.site.register(Question, QuestionAdmin)
+
+
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at",
+        "method",
+        "path",
+        "status_code",
+        "duration_ms",
+        "query_count",
+        "trigger",
+    )
+    list_filter = ("trigger", "status_code")
+    search_fields = ("path",)
+    # The files are not under MEDIA_ROOT; they are only served by download_view.
+    exclude = ("profile", "sql_log")
+    readonly_fields = [
+        field.name
+        for field in RequestProfile._meta.fields
+        if field.name not in ("profile", "sql_log")
+    ] + ["profile_download", "sql_log_download"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<path:object_id>/download/<str:field>/",
+                self.admin_site.admin_view(self.download_view),
+                name="analysis_requestprofile_download",
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, object_id, field):
+        if field not in ("profile", "sql_log"):
+            raise Http404
+        record = self.get_object(request, object_id)
+        if record is None:
+            raise Http404
+        if not self.has_view_permission(request, record):
+            raise PermissionDenied
+        file = getattr(record, field)
+        if not file:
+            raise Http404
+        return FileResponse(
+            file.open("rb"), as_attachment=True, filename=file.name.rsplit("/", 1)[-1]
+        )
+
+    def _download_link(self, obj, field):
+        if not obj.pk or not getattr(obj, field):
+            return "-"
+        return format_html(
+            '<a href="{}">Download</a>',
+            reverse("admin:analysis_requestprofile_download", args=[obj.pk, field]),
+        )
+
+    @admin.display(description="Profile")
+    def profile_download(self, obj):
+        return self._download_link(obj, "profile")
+
+    @admin.display(description="SQL log")
+    def sql_log_download(self, obj):
+        return self._download_link(obj, "sql_log")
+
+
+admin.site.register(RequestProfile, RequestProfileAdmin)
+
+
+class DailyPlanStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        "date",
+        "plan",
+        "invoices",
+        "revenue",
+        "paid_revenue",
+        "started",
+        "completed",
+        "median_minutes_to_complete",
+    )
+    list_filter = ("plan",)
+    date_hierarchy = "date"
+    readonly_fields = [field.name for field in DailyPlanStats._meta.fields]
+
+    @admin.display(description="Median minutes to complete")
+    def median_minutes_to_complete(self, obj):
+        median = median_completion_range(obj.completion_minutes or [])
+        if median is None:
+            return "-"
+        lower, upper = median
+        return f"{lower}–{upper}" if upper is not None else f"> {lower}"
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(DailyPlanStats, DailyPlanStatsAdmin)
+
+
+class ScoringModelAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "plan", "version", "use_priority", "is_active", "created_at")
+    list_filter = ("plan", "is_active")
+    readonly_fields = ("version", "created_at")
+    exclude = ("priorities",)
+
+    def save_model(self, request, obj, form, change):
+        # Saved assessments keep the version they were scored with, so a change
+        # to scores, sentiments or priorities is stored as a new version
+        # instead of rewriting the old one. (De)activating keeps the version.
+        with transaction.atomic():
+            versions = ScoringModel.objects.select_for_update().filter(
+                plan=obj.plan
+            )
+            priorities = ScoringModel.question_priorities()
+            changed = set(form.changed_data)
+            # Saving unchanged picks up question priority edits, if there are any.
+            if change and changed <= {"is_active"} and (
+                changed or obj.priorities == priorities
+            ):
+                obj.save(update_fields=["is_active"])
+            else:
+                obj.pk = None
+                obj._state.adding = True
+                obj.priorities = priorities
+                obj.version = (
+                    max(versions.values_list("version", flat=True), default=0) + 1
+                )
+                obj.save()
+            if obj.is_active:
+                versions.exclude(pk=obj.pk).update(is_active=False)
+
+
+admin.site.register(ScoringModel, ScoringModelAdmin)
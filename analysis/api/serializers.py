@@ -22,7 +22,8 @@ class QuestionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Question
-        fields = "__all__"
+        # plan_mask is internal; plan membership is still listed under "plan".
+        exclude = ["plan_mask"]
 
     def get_answer(self, obj):
         answer = Answer.objects.filter(
@@ -44,4 +45,8 @@ class AnswerSerializer(serializers.ModelSerializer):
 
 class AssessmentResultsSerializer(serializers.Serializer):
     def to_representation(self, assessment):
-        return build_assessment_results(assessment)
+        return build_assessment_results(
+            assessment,
+            fields=self.context.get("fields"),
+            function_ids=self.context.get("function_ids"),
+        )
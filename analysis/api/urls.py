@@ -6,11 +6,26 @@ urlpatterns = [
     path("create-functions/", create_functions, name="create_functions"),
     path("create-questions/", create_questions, name="create_questions"),
     path("invoice/", InvoiceView.as_view(), name="invoice"),
-    path("questions/<str:invoice_uid>", QuestionsView.as_view(), name="questions"),
-    path("start/<str:invoice_uid>", AnswerView.as_view(), name="submit_answers"),
-    path("result/<str:invoice_uid>", ResultsView.as_view(), name="results"),
+    path("dashboard/", DashboardView.as_view(), name="dashboard"),
+    path("questions/search", QuestionSearchView.as_view(), name="question_search"),
     path(
-        "export/<str:invoice_uid>", DownloadResultsView.as_view(), name="export_results"
+        "questions/bundle/<str:plan>/<str:lang>/r<int:revision>.json",
+        QuestionBundleView.as_view(),
+        name="question_bundle",
     ),
-    path("export-results/<str:invoice_uid>", ExportAnswersView.as_view(), name="export_results"),
+    path("questions/<uuid:invoice_uid>", QuestionsView.as_view(), name="questions"),
+    path("start/<uuid:invoice_uid>", AnswerView.as_view(), name="submit_answers"),
+    path(
+        "respondents/<uuid:invoice_uid>", RespondentView.as_view(), name="respondents"
+    ),
+    path(
+        "respond/<uuid:respondent_uid>",
+        RespondentAnswerView.as_view(),
+        name="respondent_answers",
+    ),
+    path("result/<uuid:invoice_uid>", ResultsView.as_view(), name="results"),
+    path(
+        "export/<uuid:invoice_uid>", DownloadResultsView.as_view(), name="export_results"
+    ),
+    path("export-results/<uuid:invoice_uid>", ExportAnswersView.as_view(), name="export_results"),
 ]
@@ -1,39 +1,155 @@
 import io
-from collections import Counter
-from typing import Dict, List
+import sys
+import threading
+from array import array
+from collections import Counter, OrderedDict, namedtuple
+from typing import Dict, Iterable, List, Tuple
 
+import numpy as np
 import pandas as pd
+from django.db import transaction
+from django.db.models import Case, Count, F, Sum, Value, When
 from django.http import HttpResponse
+from django.utils import timezone
 
+from analysis.catalog import canonical_question_ids, get_catalog_revision
 from analysis.choices import ANSWERS_CHOICES
-from analysis.models import Function
-
-SCORE_MAP: Dict[int, int] = {1: 0, 2: 25, 3: 50, 4: 75, 5: 100}
-SENTIMENT_MAP: Dict[int, str] = {
-    1: "negative",
-    2: "negative",
-    3: "neutral",
-    4: "positive",
-    5: "positive",
+from analysis.dashboard import record_invoice_event
+from analysis.scoring import (  # noqa: F401  (SCORE_MAP & co. stay importable here)
+    SCORE_MAP,
+    SENTIMENT_MAP,
+    SENTIMENT_ORDER,
+    active_scoring_model_id,
+    question_weight,
+    scoring_for_assessment,
+    scoring_for_invoice,
+)
+from analysis.models import (
+    Answer,
+    Assessment,
+    Function,
+    FunctionResponseCount,
+    Invoice,
+    Question,
+    ScoreHistogram,
+)
+
+# Sections and keys of the results payload that `fields=` can select.
+RESULT_FIELDS: Dict[str, List[str]] = {
+    "functions": [
+        "function_id",
+        "function_name",
+        "total_questions",
+        "total_score",
+        "distribution",
+        "sentiment",
+        "percentile",
+    ],
+    "overall": [
+        "total_questions",
+        "total_answers",
+        "total_score",
+        "distribution",
+        "sentiment",
+        "percentile",
+    ],
 }
-SENTIMENT_ORDER: List[str] = ["negative", "neutral", "positive"]
 
 
-def _ensure_plan_functions(assessment):
+# uid -> (id, plan) of an invoice never changes, so each process keeps the
+# most recently used ones and skips the lookup on repeat requests.
+InvoiceKey = namedtuple("InvoiceKey", ["id", "plan_id", "plan_name"])
+INVOICE_CACHE_SIZE = 4096
+
+_invoice_keys: "OrderedDict[object, InvoiceKey]" = OrderedDict()
+_invoice_keys_lock = threading.Lock()
+
+
+def _remember_invoice(invoice):
+    key = InvoiceKey(invoice.id, invoice.plan_id, invoice.plan.name)
+    with _invoice_keys_lock:
+        _invoice_keys[invoice.uid] = key
+        while len(_invoice_keys) > INVOICE_CACHE_SIZE:
+            _invoice_keys.popitem(last=False)
+    return key
+
+
+def _cached_invoice_key(invoice_uid):
+    with _invoice_keys_lock:
+        key = _invoice_keys.get(invoice_uid)
+        if key is not None:
+            _invoice_keys.move_to_end(invoice_uid)
+    return key
+
+
+def forget_invoice(invoice_uid):
+    with _invoice_keys_lock:
+        _invoice_keys.pop(invoice_uid, None)
+
+
+def resolve_invoice(invoice_uid) -> InvoiceKey:
+    """
+    Id, plan id and plan name of the invoice with this UUID, from the cache or
+    one query. Raises Invoice.DoesNotExist.
+    """
+    key = _cached_invoice_key(invoice_uid)
+    if key is None:
+        key = _remember_invoice(
+            Invoice.objects.select_related("plan").get(uid=invoice_uid)
+        )
+    return key
+
+
+def lock_invoice(invoice_id):
+    """Lock the invoice row for the current transaction; False if it is gone."""
+    return bool(
+        list(
+            Invoice.objects.select_for_update()
+            .filter(id=invoice_id)
+            .values_list("id", flat=True)
+        )
+    )
+
+
+def resolve_assessment(invoice_uid, completed=False):
+    """
+    The invoice's assessment with the invoice and plan loaded, in one query.
+    Raises Invoice.DoesNotExist or Assessment.DoesNotExist, also when
+    `completed` is set and the assessment is not completed.
+    """
+    key = _cached_invoice_key(invoice_uid)
+    if key is None:
+        invoice = Invoice.objects.select_related("plan", "assessment").get(
+            uid=invoice_uid
+        )
+        _remember_invoice(invoice)
+        assessment = invoice.assessment
+    else:
+        assessment = Assessment.objects.select_related("invoice__plan").get(
+            invoice_id=key.id
+        )
+    if completed and not assessment.is_completed:
+        raise Assessment.DoesNotExist("Assessment is not completed.")
+    return assessment
+
+
+def _ensure_plan_functions(assessment, function_ids=None):
     invoice = assessment.invoice
-    plan_functions = {
-        function.id: function
-        for function in Function.objects.filter(questions__plan=invoice.plan).distinct()
-    }
+    questions = Question.objects.for_plan(invoice.plan)
+    if function_ids:
+        questions = questions.filter(function_id__in=function_ids)
+    question_counts = dict(
+        questions.order_by().values_list("function_id").annotate(count=Count("id"))
+    )
+    plan_functions = Function.objects.in_bulk(list(question_counts))
 
     per_function_data = {
         function_id: {
             "function": plan_function,
             "counts": Counter(),
+            "weights": Counter(),
             "total_answers": 0,
-            "question_count": plan_function.questions.filter(plan=invoice.plan)
-            .distinct()
-            .count(),
+            "question_count": question_counts[function_id],
         }
         for function_id, plan_function in plan_functions.items()
     }
@@ -41,127 +157,674 @@ def _ensure_plan_functions(assessment):
     return plan_functions, per_function_data
 
 
-def build_assessment_results(assessment):
+class StaleCatalogError(ValueError):
+    """A compact submission was built against an older catalog revision."""
+
+    def __init__(self, revision):
+        super().__init__(f"Catalog has changed; current version is {revision}.")
+        self.revision = revision
+
+
+def decode_compact_responses(responses, question_ids) -> List[Tuple[int, int]]:
+    """
+    Decode positional responses, a digit string like ``"3450..."`` or a list
+    of ints, aligned with ``question_ids``. 0 means unanswered.
+    """
+    if isinstance(responses, str):
+        values = np.frombuffer(responses.encode("ascii"), dtype=np.uint8) - ord("0")
+    elif isinstance(responses, list) and all(
+        type(value) is int for value in responses
+    ):
+        try:
+            values = np.array(responses, dtype=np.int64)
+        except OverflowError:
+            raise ValueError("Responses must be one of the answer choices or 0.")
+    else:
+        raise ValueError("Responses must be a digit string or a list of integers.")
+    if len(values) != len(question_ids):
+        raise ValueError(
+            f"Expected {len(question_ids)} responses, got {len(values)}."
+        )
+    if not np.isin(values, [0, *(value for value, _ in ANSWERS_CHOICES)]).all():
+        raise ValueError("Responses must be one of the answer choices or 0.")
+
+    answered = values != 0
+    return list(
+        zip(
+            np.asarray(question_ids, dtype=np.int64)[answered].tolist(),
+            values[answered].tolist(),
+        )
+    )
+
+
+def parse_answer_payload(payload, plan_name=None) -> List[Tuple[int, int]]:
+    """
+    Read a submission: a list of ``{"question_id": .., "answer_id": ..}`` or
+    ``{question_id: response}`` dicts, or the compact
+    ``{"catalog_version": .., "responses": ..}`` form positional in the plan's
+    canonical question order. Returns ``(question_id, response)`` pairs;
+    raises StaleCatalogError if the compact form's version is outdated.
+    """
+    if isinstance(payload, dict) and "responses" in payload:
+        revision = get_catalog_revision()
+        if payload.get("catalog_version") != revision:
+            raise StaleCatalogError(revision)
+        return decode_compact_responses(
+            payload["responses"], canonical_question_ids(plan_name, revision)
+        )
+
+    pairs = []
+    for answer_map in payload:
+        if "question_id" in answer_map and "answer_id" in answer_map:
+            question_id = answer_map["question_id"]
+            answer_id = answer_map["answer_id"]
+        else:
+            question_id, answer_id = next(iter(answer_map.items()))
+        pairs.append((int(question_id), int(answer_id)))
+    return pairs
+
+
+def submit_respondent_answers(respondent, pairs):
+    """
+    Store one respondent's answers and add them to the invoice's running
+    FunctionResponseCount counters in a single UPDATE.
+    """
+    invoice = respondent.invoice
+    question_functions = dict(
+        Question.objects.for_plan(invoice.plan)
+        .filter(id__in=[question_id for question_id, _ in pairs])
+        .values_list("id", "function_id")
+    )
+    unknown = [
+        question_id for question_id, _ in pairs if question_id not in question_functions
+    ]
+    if unknown:
+        raise ValueError(f"Questions {unknown} are not part of the invoice's plan.")
+    valid_responses = {value for value, _ in ANSWERS_CHOICES}
+    if any(response not in valid_responses for _, response in pairs):
+        raise ValueError("Responses must be one of the answer choices.")
+
+    pairs = dict(pairs)
+    scoring = scoring_for_invoice(invoice.id, invoice.plan_id)
+    counts = Counter()
+    weights = Counter()
+    for question_id, response in pairs.items():
+        key = (question_functions[question_id], response)
+        counts[key] += 1
+        weights[key] += question_weight(scoring, question_id)
+    Answer.objects.bulk_create(
+        Answer(
+            invoice_id=invoice.id,
+            respondent_id=respondent.id,
+            question_id=question_id,
+            response=response,
+        )
+        for question_id, response in pairs.items()
+    )
+    FunctionResponseCount.objects.bulk_create(
+        [
+            FunctionResponseCount(
+                invoice_id=invoice.id, function_id=function_id, response=response
+            )
+            for function_id, response in counts
+        ],
+        ignore_conflicts=True,
+    )
+    FunctionResponseCount.objects.filter(
+        invoice_id=invoice.id, function_id__in={function_id for function_id, _ in counts}
+    ).update(
+        count=F("count")
+        + Case(
+            *(
+                When(function_id=function_id, response=response, then=Value(count))
+                for (function_id, response), count in counts.items()
+            ),
+            default=Value(0),
+        ),
+        weight=F("weight")
+        + Case(
+            *(
+                When(function_id=function_id, response=response, then=Value(weight))
+                for (function_id, response), weight in weights.items()
+            ),
+            default=Value(0),
+        ),
+    )
+    respondent.is_completed = True
+    respondent.save(update_fields=["is_completed"])
+
+
+def pack_answers(pairs: Iterable[Tuple[int, int]]) -> Tuple[bytes, bytes]:
+    """Encode ``(question_id, response)`` pairs sorted by question id."""
+    pairs = sorted(pairs)
+    question_ids = array("I", (question_id for question_id, _ in pairs))
+    if sys.byteorder == "big":
+        question_ids.byteswap()
+    return question_ids.tobytes(), bytes(response for _, response in pairs)
+
+
+def unpack_answers(packed_question_ids, packed_responses) -> List[Tuple[int, int]]:
+    question_ids = array("I")
+    question_ids.frombytes(bytes(packed_question_ids))
+    if sys.byteorder == "big":
+        question_ids.byteswap()
+    return list(zip(question_ids, bytes(packed_responses)))
+
+
+def assessment_answer_pairs(assessment) -> List[Tuple[int, int]]:
+    """Return ``(question_id, response)`` pairs from packed storage or live rows."""
+    if assessment.is_packed:
+        return unpack_answers(
+            assessment.packed_question_ids, assessment.packed_responses
+        )
+    return list(
+        Answer.objects.filter(invoice_id=assessment.invoice_id)
+        .order_by("question_id", "id")
+        .values_list("question_id", "response")
+    )
+
+
+def pack_assessment(assessment_id):
+    """
+    Move a completed assessment's Answer rows into its packed columns and delete
+    the rows. Raises ValueError when the answers cannot be packed losslessly.
+    The invoice is locked first, like AnswerView does, so no answer can be
+    added between reading the rows and deleting them.
+    """
+    invoice_id = Assessment.objects.values_list("invoice_id", flat=True).get(
+        id=assessment_id
+    )
+    with transaction.atomic():
+        lock_invoice(invoice_id)
+        assessment = Assessment.objects.select_for_update().get(id=assessment_id)
+        if not assessment.is_completed:
+            raise ValueError("Assessment is not completed.")
+        if assessment.is_packed:
+            return 0
+
+        answers = Answer.objects.filter(invoice_id=assessment.invoice_id)
+        pairs = list(answers.values_list("question_id", "response"))
+        if answers.filter(respondent__isnull=False).exists():
+            raise ValueError("Assessment has several respondents.")
+        if len({question_id for question_id, _ in pairs}) != len(pairs):
+            raise ValueError("Assessment has several answers to the same question.")
+        if any(not 0 <= response <= 255 for _, response in pairs):
+            raise ValueError("Assessment has responses outside the byte range.")
+
+        (
+            assessment.packed_question_ids,
+            assessment.packed_responses,
+        ) = pack_answers(pairs)
+        assessment.save(update_fields=["packed_question_ids", "packed_responses"])
+        answers.delete()
+        return len(pairs)
+
+
+def unpack_assessment(assessment_id):
+    """Restore the Answer rows of a packed assessment and clear the packed columns."""
+    invoice_id = Assessment.objects.values_list("invoice_id", flat=True).get(
+        id=assessment_id
+    )
+    with transaction.atomic():
+        lock_invoice(invoice_id)
+        assessment = Assessment.objects.select_for_update().get(id=assessment_id)
+        if not assessment.is_packed:
+            return 0
+
+        pairs = assessment_answer_pairs(assessment)
+        Answer.objects.bulk_create(
+            Answer(
+                invoice_id=assessment.invoice_id,
+                question_id=question_id,
+                response=response,
+            )
+            for question_id, response in pairs
+        )
+        assessment.packed_question_ids = None
+        assessment.packed_responses = None
+        assessment.save(update_fields=["packed_question_ids", "packed_responses"])
+        return len(pairs)
+
+
+def _function_response_counts(assessment, scoring, function_ids=None):
+    """
+    Return ``(function_id, response, count, weight)`` rows for the assessment,
+    from the respondent counters, the packed columns or the live Answer rows.
+    ``weight`` sums the answered questions' weights in ``scoring``, so it does
+    not move when a question's priority is edited later.
+    """
+    counters = FunctionResponseCount.objects.filter(
+        invoice_id=assessment.invoice_id, count__gt=0
+    )
+    if function_ids:
+        counters = counters.filter(function_id__in=function_ids)
+    counters = list(
+        counters.values_list("function_id", "response", "count", "weight")
+    )
+    if counters:
+        return counters
+
+    if assessment.is_packed:
+        pairs = assessment_answer_pairs(assessment)
+        question_functions = dict(
+            Question.objects.filter(
+                id__in=[question_id for question_id, _ in pairs]
+            ).values_list("id", "function_id")
+        )
+        rows = (
+            (question_id, question_functions.get(question_id), response, 1)
+            for question_id, response in pairs
+        )
+    else:
+        answers = Answer.objects.filter(invoice_id=assessment.invoice_id)
+        if function_ids:
+            answers = answers.filter(question__function_id__in=function_ids)
+        rows = (
+            answers.order_by()
+            .values_list("question_id", "question__function_id", "response")
+            .annotate(count=Count("id"))
+        )
+
+    counts = Counter()
+    weights = Counter()
+    for question_id, function_id, response, count in rows:
+        counts[(function_id, response)] += count
+        weights[(function_id, response)] += count * question_weight(
+            scoring, question_id
+        )
+    return [
+        (function_id, response, count, weights[(function_id, response)])
+        for (function_id, response), count in counts.items()
+        if not function_ids or function_id in function_ids
+    ]
+
+
+def _response_counts(assessment, scoring):
+    """
+    Answers and weights per response value over the whole assessment, in one
+    grouped query.
+    """
+    counts = Counter()
+    weights = Counter()
+    rows = (
+        FunctionResponseCount.objects.filter(
+            invoice_id=assessment.invoice_id, count__gt=0
+        )
+        .order_by()
+        .values_list("response")
+        .annotate(total=Sum("count"), total_weight=Sum("weight"))
+    )
+    if rows:
+        for response, count, weight in rows:
+            counts[response] = count
+            weights[response] = weight or 0
+        return counts, weights
+
+    if assessment.is_packed:
+        pairs = assessment_answer_pairs(assessment)
+        known = set(
+            Question.objects.filter(
+                id__in=[question_id for question_id, _ in pairs]
+            ).values_list("id", flat=True)
+        )
+        rows = (
+            (question_id, response, 1)
+            for question_id, response in pairs
+            if question_id in known
+        )
+    else:
+        rows = (
+            Answer.objects.filter(invoice_id=assessment.invoice_id)
+            .order_by()
+            .values_list("question_id", "response")
+            .annotate(count=Count("id"))
+        )
+
+    for question_id, response, count in rows:
+        counts[response] += count
+        weights[response] += count * question_weight(scoring, question_id)
+    return counts, weights
+
+
+def _summarize_counts(counts, total_answers, weights, scoring):
+    """Score, distribution and sentiment blocks for a Counter of responses."""
     answer_scale = [value for value, _ in ANSWERS_CHOICES]
-    plan_functions, per_function_data = _ensure_plan_functions(assessment)
+    scores = scoring.scores
+    sentiments = scoring.sentiments
+
+    distribution = {
+        str(answer_value): (
+            round((counts.get(answer_value, 0) / total_answers) * 100, 2)
+            if total_answers
+            else 0
+        )
+        for answer_value in answer_scale
+    }
+
+    # Scores are plain index lookups into the compiled model's tables.
+    multipliers = weights if scoring.use_priority else counts
+    score_sum = sum(
+        scores[answer_value] * multipliers.get(answer_value, 0)
+        for answer_value in answer_scale
+        if answer_value < len(scores)
+    )
+    denominator = (
+        sum(multipliers.get(answer_value, 0) for answer_value in answer_scale)
+        if scoring.use_priority
+        else total_answers
+    )
+    final_score = round(score_sum / denominator, 2) if denominator else 0
+
+    sentiment_counts = {sentiment: 0 for sentiment in scoring.sentiment_order}
+    for answer_value, count in counts.items():
+        if answer_value < len(sentiments) and (sentiment := sentiments[answer_value]):
+            sentiment_counts[sentiment] += count
+
+    sentiment_percentages = {
+        sentiment: (round((count / total_answers) * 100, 2) if total_answers else 0)
+        for sentiment, count in sentiment_counts.items()
+    }
+
+    return {
+        "total_score": final_score,
+        "distribution": distribution,
+        "sentiment": {
+            "counts": sentiment_counts,
+            "percentages": sentiment_percentages,
+        },
+    }
+
+
+def _build_function_results(assessment, scoring, function_ids=None):
+    plan_functions, per_function_data = _ensure_plan_functions(
+        assessment, function_ids
+    )
 
     overall_counts = Counter()
-    overall_score_sum = 0
-    overall_answers = 0
+    overall_weights = Counter()
 
-    for answer in assessment.invoice.answers.select_related("question__function"):
-        function = getattr(answer.question, "function", None)
-        if function is None:
+    count_rows = _function_response_counts(assessment, scoring, function_ids)
+    missing_functions = Function.objects.in_bulk(
+        {
+            function_id
+            for function_id, _, _, _ in count_rows
+            if function_id is not None and function_id not in per_function_data
+        }
+    )
+
+    for function_id, response, count, weight in count_rows:
+        if function_id is None:
             continue
 
-        if function.id not in per_function_data:
+        if function_id not in per_function_data:
+            function = missing_functions[function_id]
             plan_functions[function.id] = function
             per_function_data[function.id] = {
                 "function": function,
                 "counts": Counter(),
+                "weights": Counter(),
                 "total_answers": 0,
-                "question_count": function.questions.filter(
-                    plan=assessment.invoice.plan
-                )
-                .distinct()
+                "question_count": Question.objects.for_plan(assessment.invoice.plan)
+                .filter(function_id=function.id)
                 .count(),
             }
 
-        function_data = per_function_data[function.id]
-        function_data["counts"][answer.response] += 1
-        function_data["total_answers"] += 1
+        function_data = per_function_data[function_id]
+        function_data["counts"][response] += count
+        function_data["weights"][response] += weight or 0
+        function_data["total_answers"] += count
 
-        overall_counts[answer.response] += 1
-        overall_score_sum += SCORE_MAP.get(answer.response, 0)
-        overall_answers += 1
+        overall_counts[response] += count
+        overall_weights[response] += weight or 0
 
     function_results = []
     for function_id in sorted(per_function_data):
         data = per_function_data[function_id]
         function_obj = data["function"]
-        total_answers = data["total_answers"]
-        question_count = data["question_count"]
-
-        distribution = {
-            str(answer_value): (
-                round((data["counts"].get(answer_value, 0) / total_answers) * 100, 2)
-                if total_answers
-                else 0
-            )
-            for answer_value in answer_scale
-        }
-
-        score_sum = sum(
-            SCORE_MAP.get(answer_value, 0) * data["counts"].get(answer_value, 0)
-            for answer_value in answer_scale
-        )
-        final_score = round(score_sum / total_answers, 2) if total_answers else 0
-
-        sentiment_counts = {sentiment: 0 for sentiment in SENTIMENT_ORDER}
-        for answer_value, count in data["counts"].items():
-            if sentiment := SENTIMENT_MAP.get(answer_value):
-                sentiment_counts[sentiment] += count
-
-        sentiment_percentages = {
-            sentiment: (round((count / total_answers) * 100, 2) if total_answers else 0)
-            for sentiment, count in sentiment_counts.items()
-        }
 
         function_results.append(
             {
+                "function_id": function_id,
                 "function_name": {
                     "az": function_obj.az,
                     "en": function_obj.en,
                     "ru": function_obj.ru,
                 },
-                "total_questions": question_count,
-                "total_score": final_score,
-                "distribution": distribution,
-                "sentiment": {
-                    "counts": sentiment_counts,
-                    "percentages": sentiment_percentages,
-                },
+                "total_questions": data["question_count"],
+                **_summarize_counts(
+                    data["counts"], data["total_answers"], data["weights"], scoring
+                ),
             }
         )
 
-    overall_distribution = {
-        str(answer_value): (
-            round((overall_counts.get(answer_value, 0) / overall_answers) * 100, 2)
-            if overall_answers
-            else 0
+    total_questions = sum(data["question_count"] for data in per_function_data.values())
+    return function_results, (overall_counts, overall_weights), total_questions
+
+
+def build_assessment_results(assessment, fields=None, function_ids=None):
+    """
+    Build the results payload. `fields` maps the sections to compute
+    ("functions", "overall") to the keys needed, or None for all of them;
+    `function_ids` limits the functions section. Without functions, the
+    overall section comes from one grouped query over the responses.
+    """
+    fields = fields or dict.fromkeys(RESULT_FIELDS)
+    scoring = scoring_for_assessment(assessment)
+    results = {}
+    overall_counts = total_questions = None
+
+    if "functions" in fields:
+        function_results, overall_counts, total_questions = _build_function_results(
+            assessment, scoring, function_ids
         )
-        for answer_value in answer_scale
-    }
+        results["functions"] = function_results
+        if function_ids:
+            overall_counts = total_questions = None
 
-    overall_sentiment_counts = {sentiment: 0 for sentiment in SENTIMENT_ORDER}
-    for answer_value, count in overall_counts.items():
-        if sentiment := SENTIMENT_MAP.get(answer_value):
-            overall_sentiment_counts[sentiment] += count
+    if "overall" in fields:
+        overall_keys = fields["overall"]
+        if overall_counts is None:
+            overall_counts = _response_counts(assessment, scoring)
+        if total_questions is None and (
+            overall_keys is None or "total_questions" in overall_keys
+        ):
+            total_questions = Question.objects.for_plan(
+                assessment.invoice.plan
+            ).count()
 
-    overall_sentiment_percentages = {
-        sentiment: (round((count / overall_answers) * 100, 2) if overall_answers else 0)
-        for sentiment, count in overall_sentiment_counts.items()
-    }
+        counts, weights = overall_counts
+        overall_answers = sum(counts.values())
+        results["overall"] = {
+            "total_questions": total_questions,
+            "total_answers": overall_answers,
+            **_summarize_counts(counts, overall_answers, weights, scoring),
+        }
+
+    return results
 
-    overall_final_score = (
-        round(overall_score_sum / overall_answers, 2) if overall_answers else 0
-    )
 
+def parse_result_fields(value):
+    """
+    Parse `fields=overall.total_score,functions` into
+    ``{"overall": {"total_score"}, "functions": None}``. Raises ValueError.
+    """
+    fields = {}
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        section, _, key = item.partition(".")
+        if section not in RESULT_FIELDS or (key and key not in RESULT_FIELDS[section]):
+            raise ValueError(f"Unknown field '{item}'.")
+        if not key:
+            fields[section] = None
+        elif fields.get(section, set()) is not None:
+            fields.setdefault(section, set()).add(key)
     return {
-        "functions": function_results,
-        "overall": {
-            "total_questions": sum(
-                data["question_count"] for data in per_function_data.values()
-            ),
-            "total_answers": overall_answers,
-            "total_score": overall_final_score,
-            "distribution": overall_distribution,
-            "sentiment": {
-                "counts": overall_sentiment_counts,
-                "percentages": overall_sentiment_percentages,
-            },
-        },
+        section: fields[section] for section in RESULT_FIELDS if section in fields
+    } or dict.fromkeys(RESULT_FIELDS)
+
+
+def select_result_fields(results, fields):
+    selected = {}
+    for section, keys in fields.items():
+        data = results[section]
+        if keys is None:
+            selected[section] = data
+        elif section == "functions":
+            selected[section] = [
+                {key: value for key, value in item.items() if key in keys}
+                for item in data
+            ]
+        else:
+            selected[section] = {
+                key: value for key, value in data.items() if key in keys
+            }
+    return selected
+
+
+def _score_bucket(score):
+    return min(max(int(round(score)), 0), ScoreHistogram.BUCKETS - 1)
+
+
+def score_buckets(results):
+    """Histogram bucket of every answered function and of the overall score."""
+    buckets = {}
+    for function_result in results["functions"]:
+        if any(function_result["distribution"].values()):
+            buckets[str(function_result["function_id"])] = _score_bucket(
+                function_result["total_score"]
+            )
+    if results["overall"]["total_answers"]:
+        buckets["overall"] = _score_bucket(results["overall"]["total_score"])
+    return buckets
+
+
+def record_assessment_scores(assessment_id):
+    """
+    Add a completed assessment's scores to its plan's ScoreHistogram rows,
+    replacing whatever the assessment contributed before.
+    """
+    with transaction.atomic():
+        assessment = (
+            Assessment.objects.select_for_update()
+            .select_related("invoice__plan")
+            .get(id=assessment_id)
+        )
+        plan_id = assessment.invoice.plan_id
+        new_buckets = (
+            score_buckets(build_assessment_results(assessment))
+            if assessment.is_completed
+            else {}
+        )
+        old_buckets = assessment.histogram_scores or {}
+        if new_buckets == old_buckets:
+            return
+
+        histograms = {
+            str(histogram.function_id or "overall"): histogram
+            for histogram in ScoreHistogram.objects.select_for_update().filter(
+                plan_id=plan_id
+            )
+        }
+        for key in new_buckets.keys() - histograms.keys():
+            histograms[key], _ = ScoreHistogram.objects.get_or_create(
+                plan_id=plan_id,
+                function_id=None if key == "overall" else int(key),
+                defaults={"buckets": [0] * ScoreHistogram.BUCKETS},
+            )
+
+        changed = set()
+        for key, bucket in old_buckets.items():
+            if key in histograms:
+                histograms[key].buckets[bucket] -= 1
+                histograms[key].total -= 1
+                changed.add(key)
+        for key, bucket in new_buckets.items():
+            histograms[key].buckets[bucket] += 1
+            histograms[key].total += 1
+            changed.add(key)
+
+        ScoreHistogram.objects.bulk_update(
+            [histograms[key] for key in changed], ["buckets", "total"]
+        )
+        assessment.histogram_scores = new_buckets or None
+        assessment.save(update_fields=["histogram_scores"])
+
+
+def start_assessment(invoice_id):
+    """Create the invoice's assessment on first use and count it as started."""
+    assessment, created = Assessment.objects.get_or_create(
+        invoice_id=invoice_id, defaults={"started_at": timezone.now()}
+    )
+    if created:
+        record_invoice_event(invoice_id, started=1)
+    return assessment
+
+
+def complete_assessment(invoice_id):
+    now = timezone.now()
+    with transaction.atomic():
+        assessment, created = Assessment.objects.select_for_update().get_or_create(
+            invoice_id=invoice_id, defaults={"started_at": now}
+        )
+        newly_completed = not assessment.is_completed
+        assessment.answered_at = now
+        update_fields = ["answered_at"]
+        if newly_completed:
+            assessment.is_completed = True
+            assessment.completed_at = now
+            if assessment.scoring_model_id is None:
+                assessment.scoring_model_id = active_scoring_model_id(
+                    Invoice.objects.values_list("plan_id", flat=True).get(id=invoice_id)
+                )
+            update_fields += ["is_completed", "completed_at", "scoring_model"]
+        assessment.save(update_fields=update_fields)
+
+    if created or newly_completed:
+        events = {"started": 1} if created else {}
+        if newly_completed:
+            events["completed"] = 1
+            if assessment.started_at:
+                events["completion_minutes"] = (
+                    now - assessment.started_at
+                ).total_seconds() / 60
+        record_invoice_event(invoice_id, **events)
+
+    record_assessment_scores(assessment.id)
+    return assessment
+
+
+def percentile_rank(histogram, score):
+    """Percent of the plan's assessments scoring below ``score`` (ties count half)."""
+    if histogram is None or not histogram.total:
+        return None
+    bucket = _score_bucket(score)
+    below = sum(histogram.buckets[:bucket])
+    return round((below + histogram.buckets[bucket] / 2) / histogram.total * 100, 2)
+
+
+def add_percentile_ranks(results, plan_id):
+    histograms = {
+        histogram.function_id: histogram
+        for histogram in ScoreHistogram.objects.filter(plan_id=plan_id)
     }
+    for function_result in results.get("functions", []):
+        function_result["percentile"] = (
+            percentile_rank(
+                histograms.get(function_result["function_id"]),
+                function_result["total_score"],
+            )
+            if any(function_result["distribution"].values())
+            else None
+        )
+    if "overall" in results:
+        results["overall"]["percentile"] = (
+            percentile_rank(histograms.get(None), results["overall"]["total_score"])
+            if results["overall"]["total_answers"]
+            else None
+        )
+    return results
 
 
 def queryset_to_xlxs(rows, name):
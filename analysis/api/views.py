@@ -1,10 +1,29 @@
 import json
 
 from django.http import HttpResponse as HTTPResponse
+from django.db import IntegrityError, transaction
+from django.urls import reverse
 from rest_framework import status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .utils import queryset_to_xlxs
+from .utils import (
+    StaleCatalogError,
+    add_percentile_ranks,
+    assessment_answer_pairs,
+    complete_assessment,
+    forget_invoice,
+    lock_invoice,
+    parse_answer_payload,
+    parse_result_fields,
+    queryset_to_xlxs,
+    resolve_assessment,
+    resolve_invoice,
+    select_result_fields,
+    start_assessment,
+    submit_respondent_answers,
+)
 
 from analysis.api.serializers import (
     AssessmentResultsSerializer,
@@ -12,7 +31,25 @@ from analysis.api.serializers import (
     QuestionSerializer,
     AnswerSerializer,
 )
-from analysis.models import Answer, Assessment, Function, Invoice, Plan, Question
+from analysis.catalog import (
+    CANONICAL_ORDER,
+    LANGUAGES,
+    cached_question_bundle,
+    get_catalog_revision,
+    question_bundle_url,
+)
+from analysis.choices import ANSWERS_CHOICES, PLAN_CHOICES, plan_mask_for
+from analysis.dashboard import dashboard_summary
+from analysis.models import (
+    Answer,
+    Assessment,
+    Function,
+    Invoice,
+    Plan,
+    Question,
+    Respondent,
+)
+from analysis.search import get_question_index
 
 # JSON-u oxumaq (məsələn fayldan)
 with open("json/questions.json", "r", encoding="utf-8") as f:
@@ -36,6 +73,7 @@ def create_questions(request):
         # Fetch related Function and Plans
         function = Function.objects.get(id=item["function_id"])
         plans = Plan.objects.filter(name__in=item["type"])
+        plan_mask = plan_mask_for(plan.name for plan in plans)
 
         # Extract multilingual fields
         name = item["question"]
@@ -47,6 +85,7 @@ def create_questions(request):
             en=name["en"],
             ru=name["ru"],
             priority=item["priority"],
+            plan_mask=plan_mask,
         )
         # The instance returned by .create() is already saved; an extra .save() is unnecessary.
         question.plan.set(plans)
@@ -65,64 +104,304 @@ class InvoiceView(APIView):
 
 class QuestionsView(APIView):
     def get(self, request, invoice_uid):
+        """
+        Return the plan's questions. With `lang`, return the URL of the
+        catalog bundle for that language and the invoice's answers instead:
+        the collected static bundle, or QuestionBundleView's until the next
+        deploy collects one for the current revision.
+        The catalog version for compact submissions is also sent in the
+        `X-Catalog-Version` header.
+        """
         try:
-            invoice = Invoice.objects.get(uid=invoice_uid)
+            invoice = resolve_invoice(invoice_uid)
         except Invoice.DoesNotExist:
             return Response(
                 {"error": "Invoice not found."}, status=status.HTTP_404_NOT_FOUND
             )
 
-        plan = invoice.plan
+        try:
+            assessment = start_assessment(invoice.id)
+        except IntegrityError:
+            # The cached invoice was deleted (e.g. purged) by another process.
+            forget_invoice(invoice_uid)
+            return Response(
+                {"error": "Invoice not found."}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        language = request.query_params.get("lang")
+        if language:
+            # Catalog as a prebuilt static bundle, plus this invoice's answers.
+            if language not in LANGUAGES:
+                return Response(
+                    {"error": "Unknown language."}, status=status.HTTP_400_BAD_REQUEST
+                )
+            revision = get_catalog_revision()
+            bundle = question_bundle_url(invoice.plan_name, language, revision)
+            if bundle is None:
+                bundle = reverse(
+                    "question_bundle",
+                    args=[invoice.plan_name, language, revision],
+                )
+            payload = {
+                "catalog_version": revision,
+                "bundle": bundle,
+                "answers": dict(assessment_answer_pairs(assessment)),
+            }
+            return Response(payload, status=status.HTTP_200_OK)
+
         questions = (
-            Question.objects.filter(plan=plan)
+            Question.objects.for_plan(invoice.plan_name)
             .select_related("function")
-            .order_by("-function__id", "id")
+            .order_by(*CANONICAL_ORDER)
         )
 
         serializer = QuestionSerializer(questions, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(
+            serializer.data,
+            status=status.HTTP_200_OK,
+            headers={"X-Catalog-Version": str(get_catalog_revision())},
+        )
+
+
+class QuestionBundleView(APIView):
+    def get(self, request, plan, lang, revision):
+        """
+        Catalog bundle of the current revision, for when its static file has
+        not been collected yet. The URL names the revision, so it is cached
+        as immutable like the static bundles.
+        """
+        if plan not in dict(PLAN_CHOICES) or lang not in LANGUAGES:
+            return Response(
+                {"error": "Unknown plan or language."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        if revision != get_catalog_revision():
+            return Response(
+                {"error": "Catalog version is no longer available."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        response = HTTPResponse(
+            cached_question_bundle(plan, lang, revision),
+            content_type="application/json; charset=utf-8",
+        )
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+class QuestionSearchView(APIView):
+    # Editor tool for staff signed in to the admin.
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Search question and function texts in every language. All words of
+        `q` must match (as word prefixes); `plan` narrows to one plan.
+        """
+        query = request.query_params.get("q", "").strip()
+        plan = request.query_params.get("plan")
+        if not query:
+            return Response(
+                {"error": "Query parameter 'q' is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if plan and plan not in dict(PLAN_CHOICES):
+            return Response(
+                {"error": "Unknown plan."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 50)), 500))
+        except ValueError:
+            limit = 50
+
+        index = get_question_index()
+        results = [
+            index.questions[question_id]
+            for question_id in index.search(query, plan=plan, limit=limit)
+        ]
+        return Response(results, status=status.HTTP_200_OK)
 
 
 class AnswerView(APIView):
     def post(self, request, invoice_uid):
-        answers = request.data
-        answer_queryset = []
-        for answer_map in answers:
-            if "question_id" in answer_map and "answer_id" in answer_map:
-                question_id = answer_map["question_id"]
-                answer_id = answer_map["answer_id"]
-            else:
-                question_id, answer_id = next(iter(answer_map.items()))
-
-            answer_queryset.append(
-                Answer(
-                    invoice_id=Invoice.objects.get(uid=invoice_uid).id,
-                    question_id=question_id,
-                    response=answer_id,
+        """
+        Store the invoice's answers, as a list of answer dicts or in the
+        compact `{"catalog_version", "responses"}` form, and complete the
+        assessment.
+        """
+        try:
+            invoice = resolve_invoice(invoice_uid)
+        except Invoice.DoesNotExist:
+            return Response(
+                {"error": "Invoice not found."}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            pairs = parse_answer_payload(request.data, invoice.plan_name)
+        except StaleCatalogError as exc:
+            return Response(
+                {"error": str(exc), "catalog_version": exc.revision},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except (AttributeError, StopIteration, TypeError, ValueError):
+            return Response(
+                {"error": "Invalid answers payload."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        answer_queryset = [
+            Answer(invoice_id=invoice.id, question_id=question_id, response=answer_id)
+            for question_id, answer_id in pairs
+        ]
+
+        with transaction.atomic():
+            if not lock_invoice(invoice.id):
+                # Deleted since this process cached it.
+                forget_invoice(invoice_uid)
+                return Response(
+                    {"error": "Invoice not found."}, status=status.HTTP_404_NOT_FOUND
+                )
+            # Checked under the lock: pack_assessment takes it too.
+            if Assessment.objects.filter(
+                invoice_id=invoice.id, packed_responses__isnull=False
+            ).exists():
+                return Response(
+                    {"error": "Assessment is archived and can no longer be changed."},
+                    status=status.HTTP_409_CONFLICT,
                 )
+            # Results come from the respondent counters once respondents exist.
+            if Respondent.objects.filter(invoice_id=invoice.id).exists():
+                return Response(
+                    {"error": "This invoice collects answers per respondent."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            Answer.objects.bulk_create(answer_queryset)
+        complete_assessment(invoice.id)
+        return Response({"status": "Answers received."}, status=status.HTTP_200_OK)
+
+
+class RespondentView(APIView):
+    def post(self, request, invoice_uid):
+        try:
+            invoice = resolve_invoice(invoice_uid)
+        except Invoice.DoesNotExist:
+            return Response(
+                {"error": "Invoice not found."}, status=status.HTTP_404_NOT_FOUND
             )
 
-        Answer.objects.bulk_create(answer_queryset)
-        Assessment.objects.update_or_create(
-            invoice_id=Invoice.objects.get(uid=invoice_uid).id,
-            defaults={"is_completed": True},
-        )
+        with transaction.atomic():
+            if not lock_invoice(invoice.id):
+                # Deleted since this process cached it.
+                forget_invoice(invoice_uid)
+                return Response(
+                    {"error": "Invoice not found."}, status=status.HTTP_404_NOT_FOUND
+                )
+            if (
+                Answer.objects.filter(
+                    invoice_id=invoice.id, respondent__isnull=True
+                ).exists()
+                or Assessment.objects.filter(
+                    invoice_id=invoice.id, packed_responses__isnull=False
+                ).exists()
+            ):
+                return Response(
+                    {"error": "This invoice already has answers submitted directly."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            respondent = Respondent.objects.create(invoice_id=invoice.id)
+        start_assessment(invoice.id)
+        return Response({"uid": respondent.uid}, status=status.HTTP_201_CREATED)
+
+
+class RespondentAnswerView(APIView):
+    def post(self, request, respondent_uid):
+        """
+        Store one respondent's answers and add them to the invoice's running
+        counters. Each respondent can submit only once. Accepts the same
+        payload forms as AnswerView.
+        """
+        with transaction.atomic():
+            try:
+                respondent = (
+                    Respondent.objects.select_for_update()
+                    .select_related("invoice__plan")
+                    .get(uid=respondent_uid)
+                )
+            except Respondent.DoesNotExist:
+                return Response(
+                    {"error": "Respondent not found."},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            if respondent.is_completed:
+                return Response(
+                    {"error": "Respondent has already submitted answers."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            try:
+                pairs = parse_answer_payload(
+                    request.data, respondent.invoice.plan.name
+                )
+            except StaleCatalogError as exc:
+                return Response(
+                    {"error": str(exc), "catalog_version": exc.revision},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            except (AttributeError, StopIteration, TypeError, ValueError):
+                return Response(
+                    {"error": "Invalid answers payload."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            try:
+                submit_respondent_answers(respondent, pairs)
+            except ValueError as exc:
+                return Response(
+                    {"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST
+                )
+
+        complete_assessment(respondent.invoice_id)
         return Response({"status": "Answers received."}, status=status.HTTP_200_OK)
 
 
 class ResultsView(APIView):
     def get(self, request, invoice_uid):
+        """
+        Return the assessment results. `fields` (e.g. `overall.total_score` or
+        `functions,overall.total_score`) and `function` (comma-separated ids)
+        restrict the payload, and only the requested sections are computed.
+        """
+        try:
+            fields = parse_result_fields(request.query_params.get("fields"))
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            invoice = Invoice.objects.get(uid=invoice_uid)
-            assessment = Assessment.objects.get(invoice=invoice)
+            function_ids = [
+                int(function_id)
+                for function_id in request.query_params.get("function", "").split(",")
+                if function_id.strip()
+            ]
+        except ValueError:
+            return Response(
+                {"error": "'function' must be a comma-separated list of ids."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            assessment = resolve_assessment(invoice_uid, completed=True)
         except (Invoice.DoesNotExist, Assessment.DoesNotExist):
             return Response(
                 {"error": "Invoice or Assessment not found."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        serializer = AssessmentResultsSerializer(assessment)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        serializer = AssessmentResultsSerializer(
+            assessment, context={"fields": fields, "function_ids": function_ids}
+        )
+        results = serializer.data
+        if any(keys is None or "percentile" in keys for keys in fields.values()):
+            results = add_percentile_ranks(results, assessment.invoice.plan_id)
+        return Response(
+            select_result_fields(results, fields), status=status.HTTP_200_OK
+        )
 
 
 class DownloadResultsView(APIView):
@@ -132,8 +411,7 @@ class DownloadResultsView(APIView):
         Returns 404 if either the Invoice or its Assessment does not exist.
         """
         try:
-            invoice = Invoice.objects.get(uid=invoice_uid)
-            assessment = Assessment.objects.get(invoice=invoice)
+            assessment = resolve_assessment(invoice_uid, completed=True)
         except (Invoice.DoesNotExist, Assessment.DoesNotExist):
             return Response(
                 {"error": "Invoice or Assessment not found."},
@@ -170,24 +448,59 @@ class DownloadResultsView(APIView):
 class ExportAnswersView(APIView):
     def get(self, request, invoice_uid):
         try:
-            invoice = Invoice.objects.get(uid=invoice_uid)
+            invoice = resolve_invoice(invoice_uid)
         except Invoice.DoesNotExist:
             return Response({"error": "Invoice not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        answers = (
-            Answer.objects.filter(invoice=invoice)
-            .select_related("question__function")
-            .order_by("-question__function__id", "question__id")
-        )
+        assessment = Assessment.objects.filter(invoice_id=invoice.id).first()
+        if assessment is not None and assessment.is_packed:
+            responses = dict(assessment_answer_pairs(assessment))
+            questions = (
+                Question.objects.filter(id__in=responses)
+                .select_related("function")
+                .order_by("-function__id", "id")
+            )
+            labels = dict(ANSWERS_CHOICES)
+            rows = [
+                {
+                    "Question": q.en,
+                    "Function": q.function.en if q.function else "",
+                    "Answer": labels.get(responses[q.id], "Unknown"),
+                }
+                for q in questions
+            ]
+        else:
+            answers = (
+                Answer.objects.filter(invoice_id=invoice.id)
+                .select_related("question__function")
+                .order_by("-question__function__id", "question__id")
+            )
 
-        rows = [
-            {
-                "Question": getattr(a.question, "en", "") if a.question else "",
-                "Function": getattr(a.question.function, "en", "") if (a.question and a.question.function) else "",
-                "Answer": a.get_response_display(),
-            }
-            for a in answers
-        ]
+            rows = [
+                {
+                    "Question": getattr(a.question, "en", "") if a.question else "",
+                    "Function": getattr(a.question.function, "en", "") if (a.question and a.question.function) else "",
+                    "Answer": a.get_response_display(),
+                }
+                for a in answers
+            ]
 
         filename = f"answers_{invoice_uid}.xlsx"
         return queryset_to_xlxs(rows, filename)
+
+
+class DashboardView(APIView):
+    # For staff signed in to the admin.
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Revenue, invoice -> started -> completed funnel and median time to
+        completion per plan over the last `days` days, read from DailyPlanStats.
+        """
+        try:
+            days = min(max(int(request.query_params.get("days", 30)), 1), 366)
+        except ValueError:
+            days = 30
+        return Response(dashboard_summary(days), status=status.HTTP_200_OK)
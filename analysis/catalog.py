@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+from collections import defaultdict
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from analysis.choices import PLAN_BITS, PLAN_CHOICES
+from analysis.models import CatalogRevision, Question
+
+CATALOG_REVISION_ID = 1
+LANGUAGES = ("az", "en", "ru")
+BUNDLE_CACHE_SECONDS = 7 * 24 * 3600
+
+# Bundles are written here by collectstatic (analysis overrides it, and Heroku
+# runs it at build time) and collected like any app static file, so the
+# manifest storage hashes and compresses them.
+BUNDLE_SOURCE_DIR = os.path.join(
+    os.path.dirname(__file__), "static", "analysis", "bundles"
+)
+
+
+def get_catalog_revision():
+    """Current catalog revision; every process can compare it to what it cached."""
+    return (
+        CatalogRevision.objects.filter(id=CATALOG_REVISION_ID)
+        .values_list("number", flat=True)
+        .first()
+        or 0
+    )
+
+
+def bump_catalog_revision():
+    updated = CatalogRevision.objects.filter(id=CATALOG_REVISION_ID).update(
+        number=F("number") + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        CatalogRevision.objects.get_or_create(
+            id=CATALOG_REVISION_ID, defaults={"number": 1}
+        )
+
+
+def expected_plan_masks(question_ids=None):
+    """Return ``{question_id: mask}`` computed from the question-plan M2M table."""
+    questions = Question.objects.all()
+    if question_ids is not None:
+        questions = questions.filter(id__in=question_ids)
+    masks = dict.fromkeys(questions.values_list("id", flat=True), 0)
+
+    memberships = Question.plan.through.objects.all()
+    if question_ids is not None:
+        memberships = memberships.filter(question_id__in=list(masks))
+    for question_id, plan_name in memberships.values_list("question_id", "plan__name"):
+        masks[question_id] |= PLAN_BITS.get(plan_name, 0)
+    return masks
+
+
+def sync_plan_masks(question_ids=None):
+    """Write plan_mask where it differs from the M2M table; returns the ids fixed."""
+    expected = expected_plan_masks(question_ids)
+    stale = defaultdict(list)
+    for question_id, current in Question.objects.filter(
+        id__in=list(expected)
+    ).values_list("id", "plan_mask"):
+        if current != expected[question_id]:
+            stale[expected[question_id]].append(question_id)
+
+    # .update() skips post_save, so syncing does not bump the revision twice.
+    for mask, ids in stale.items():
+        Question.objects.filter(id__in=ids).update(plan_mask=mask)
+    return sorted(question_id for ids in stale.values() for question_id in ids)
+
+
+def bundle_name(plan_name, language, revision):
+    return f"analysis/bundles/questions-{plan_name}-{language}-r{revision}.json"
+
+
+# Order of the questions in QuestionsView and the bundles; compact answer
+# submissions are positional in this order.
+CANONICAL_ORDER = ("-function__id", "id")
+
+_canonical_ids = {}
+_canonical_ids_lock = threading.Lock()
+
+
+def canonical_question_ids(plan_name, revision):
+    """Question ids of a plan in canonical order, cached per catalog revision."""
+    key = (plan_name, revision)
+    question_ids = _canonical_ids.get(key)
+    if question_ids is None:
+        question_ids = tuple(
+            Question.objects.for_plan(plan_name)
+            .order_by(*CANONICAL_ORDER)
+            .values_list("id", flat=True)
+        )
+        with _canonical_ids_lock:
+            for stale in [key for key in _canonical_ids if key[1] != revision]:
+                del _canonical_ids[stale]
+            _canonical_ids[key] = question_ids
+    return question_ids
+
+
+def build_question_bundle(plan_name, language, revision):
+    """Catalog of one plan in one language, in QuestionsView order."""
+    questions = (
+        Question.objects.for_plan(plan_name)
+        .order_by(*CANONICAL_ORDER)
+        .values_list("id", language, "priority", "function_id", f"function__{language}")
+    )
+    functions = {}
+    items = []
+    for question_id, text, priority, function_id, function_name in questions:
+        functions.setdefault(function_id, function_name)
+        items.append(
+            {
+                "id": question_id,
+                "function_id": function_id,
+                "text": text,
+                "priority": priority,
+            }
+        )
+    return {
+        "catalog_version": revision,
+        "plan": plan_name,
+        "lang": language,
+        "functions": [
+            {"id": function_id, "name": name} for function_id, name in functions.items()
+        ],
+        "questions": items,
+    }
+
+
+def write_question_bundles(directory=BUNDLE_SOURCE_DIR):
+    """Write every plan/language bundle for the current revision; returns the names."""
+    revision = get_catalog_revision()
+    os.makedirs(directory, exist_ok=True)
+    for stale in os.listdir(directory):
+        if stale.startswith("questions-") and stale.endswith(".json"):
+            os.remove(os.path.join(directory, stale))
+
+    names = []
+    for plan_name, _ in PLAN_CHOICES:
+        for language in LANGUAGES:
+            name = bundle_name(plan_name, language, revision)
+            path = os.path.join(directory, os.path.basename(name))
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(dump_question_bundle(plan_name, language, revision))
+            names.append(name)
+    return names
+
+
+def dump_question_bundle(plan_name, language, revision):
+    return json.dumps(
+        build_question_bundle(plan_name, language, revision),
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def cached_question_bundle(plan_name, language, revision):
+    """
+    Bundle JSON for a revision that has no collected static file yet, i.e.
+    after an editor changed the catalog. Built once and kept in the cache
+    until the next deploy collects the static bundles.
+    """
+    key = f"analysis:bundle:{plan_name}:{language}:{revision}"
+    bundle = cache.get(key)
+    if bundle is None:
+        bundle = dump_question_bundle(plan_name, language, revision)
+        cache.set(key, bundle, BUNDLE_CACHE_SECONDS)
+    return bundle
+
+
+def question_bundle_url(plan_name, language, revision):
+    """URL of the collected bundle for this revision, or None if it was not built."""
+    name = bundle_name(plan_name, language, revision)
+    hashed_files = getattr(staticfiles_storage, "hashed_files", None)
+    if hashed_files is not None:
+        if name not in hashed_files:
+            return None
+    elif not staticfiles_storage.exists(name):
+        return None
+    return staticfiles_storage.url(name)
@@ -11,3 +11,19 @@ ANSWERS_CHOICES = [
     (4, "Implemented and Functioning"),
     (5, "Systematic and Innovative Implementation"),
 ]
+
+# One bit per plan, used by Question.plan_mask.
+PLAN_BITS = {name: 1 << index for index, (name, _) in enumerate(PLAN_CHOICES)}
+
+
+def plan_masks_with(plan_name):
+    """Every plan_mask value that includes the given plan."""
+    bit = PLAN_BITS[plan_name]
+    return [mask for mask in range(1 << len(PLAN_BITS)) if mask & bit]
+
+
+def plan_mask_for(plan_names):
+    mask = 0
+    for name in plan_names:
+        mask |= PLAN_BITS[name]
+    return mask
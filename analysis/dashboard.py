@@ -0,0 +1,287 @@
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from analysis.models import Assessment, DailyPlanStats, Invoice
+
+DASHBOARD_CACHE_SECONDS = 60
+
+
+def empty_completion_histogram():
+    return [0] * (len(DailyPlanStats.COMPLETION_BUCKETS) + 1)
+
+
+def completion_bucket(minutes):
+    return bisect_left(DailyPlanStats.COMPLETION_BUCKETS, minutes)
+
+
+def _incremented(field, value):
+    # Decrements stop at zero: history from before the rollup existed is only
+    # counted once rebuild_daily_stats has run.
+    return F(field) + value if value >= 0 else Greatest(F(field) + value, 0)
+
+
+def record_daily_stats(
+    day, plan_id, completion_minutes=None, completion_count=1, **increments
+):
+    """
+    Add ``increments`` to the (day, plan) rollup row with F() updates, and
+    optionally count ``completion_count`` (-1 to remove one) completions of
+    ``completion_minutes`` minutes.
+    """
+    with transaction.atomic():
+        DailyPlanStats.objects.bulk_create(
+            [
+                DailyPlanStats(
+                    date=day,
+                    plan_id=plan_id,
+                    completion_minutes=empty_completion_histogram(),
+                )
+            ],
+            ignore_conflicts=True,
+        )
+        rows = DailyPlanStats.objects.filter(date=day, plan_id=plan_id)
+        if completion_minutes is None:
+            rows.update(
+                **{
+                    field: _incremented(field, value)
+                    for field, value in increments.items()
+                }
+            )
+            return
+
+        stats = rows.select_for_update().get()
+        for field, value in increments.items():
+            setattr(stats, field, _incremented(field, value))
+        histogram = stats.completion_minutes or empty_completion_histogram()
+        bucket = completion_bucket(completion_minutes)
+        histogram[bucket] = max(histogram[bucket] + completion_count, 0)
+        stats.completion_minutes = histogram
+        stats.save(update_fields=[*increments, "completion_minutes"])
+
+
+def record_invoice_event(invoice_id, **kwargs):
+    """Record funnel counts on the row of the invoice's issue date and plan."""
+    issued_date, plan_id = Invoice.objects.values_list("issued_date", "plan_id").get(
+        id=invoice_id
+    )
+    record_daily_stats(issued_date, plan_id, **kwargs)
+
+
+def record_invoice_change(previous, invoice):
+    """
+    Apply an edit of an invoice's date, plan, amount or payment to the rollup.
+    ``previous`` holds the saved issued_date, plan_id, amount and is_paid.
+    """
+    old_paid_revenue = previous["amount"] if previous["is_paid"] else 0
+    new_paid_revenue = invoice.amount if invoice.is_paid else 0
+    if (previous["issued_date"], previous["plan_id"]) == (
+        invoice.issued_date,
+        invoice.plan_id,
+    ):
+        changes = {
+            "revenue": invoice.amount - previous["amount"],
+            "paid_invoices": int(invoice.is_paid) - int(previous["is_paid"]),
+            "paid_revenue": new_paid_revenue - old_paid_revenue,
+        }
+        changes = {field: value for field, value in changes.items() if value}
+        if changes:
+            record_daily_stats(invoice.issued_date, invoice.plan_id, **changes)
+        return
+
+    # Moved to another row: take the whole invoice out of the old one.
+    funnel = {}
+    minutes = None
+    state = (
+        Assessment.objects.filter(invoice_id=invoice.id)
+        .values_list("is_completed", "started_at", "completed_at")
+        .first()
+    )
+    if state is not None:
+        is_completed, started_at, completed_at = state
+        funnel["started"] = 1
+        if is_completed:
+            funnel["completed"] = 1
+            if started_at and completed_at:
+                minutes = (completed_at - started_at).total_seconds() / 60
+    record_daily_stats(
+        previous["issued_date"],
+        previous["plan_id"],
+        completion_minutes=minutes,
+        completion_count=-1,
+        invoices=-1,
+        revenue=-previous["amount"],
+        paid_invoices=-int(previous["is_paid"]),
+        paid_revenue=-old_paid_revenue,
+        **{field: -value for field, value in funnel.items()},
+    )
+    record_daily_stats(
+        invoice.issued_date,
+        invoice.plan_id,
+        completion_minutes=minutes,
+        invoices=1,
+        revenue=invoice.amount,
+        paid_invoices=int(invoice.is_paid),
+        paid_revenue=new_paid_revenue,
+        **funnel,
+    )
+
+
+def record_invoices_deleted(invoice_ids):
+    """
+    Take invoices that are about to be deleted, and their assessments, out of
+    the rollup, so it keeps matching what rebuild_daily_stats computes.
+    """
+    rows = defaultdict(lambda: defaultdict(int))
+    invoices = (
+        Invoice.objects.filter(id__in=invoice_ids)
+        .order_by()
+        .values("issued_date", "plan_id")
+        .annotate(
+            invoices=Count("id"),
+            revenue=Sum("amount"),
+            paid_invoices=Count("id", filter=Q(is_paid=True)),
+            paid_revenue=Sum("amount", filter=Q(is_paid=True)),
+        )
+    )
+    for group in invoices:
+        row = rows[(group["issued_date"], group["plan_id"])]
+        for field in ("invoices", "revenue", "paid_invoices", "paid_revenue"):
+            row[field] -= group[field] or 0
+
+    completions = []
+    assessments = Assessment.objects.filter(invoice_id__in=invoice_ids).values_list(
+        "invoice__issued_date",
+        "invoice__plan_id",
+        "is_completed",
+        "started_at",
+        "completed_at",
+    )
+    for issued_date, plan_id, is_completed, started_at, completed_at in assessments:
+        row = rows[(issued_date, plan_id)]
+        row["started"] -= 1
+        if not is_completed:
+            continue
+        if started_at and completed_at:
+            minutes = (completed_at - started_at).total_seconds() / 60
+            completions.append((issued_date, plan_id, minutes))
+        else:
+            row["completed"] -= 1
+
+    for (day, plan_id), row in rows.items():
+        increments = {field: value for field, value in row.items() if value}
+        if increments:
+            record_daily_stats(day, plan_id, **increments)
+    for day, plan_id, minutes in completions:
+        record_daily_stats(
+            day,
+            plan_id,
+            completion_minutes=minutes,
+            completion_count=-1,
+            completed=-1,
+        )
+
+
+def median_completion_range(histogram):
+    """
+    ``(from, to)`` minutes of the bucket holding the median completion time;
+    ``to`` is None for the open-ended last bucket. None without completions.
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+    buckets = DailyPlanStats.COMPLETION_BUCKETS
+    cumulative = 0
+    for index, count in enumerate(histogram):
+        cumulative += count
+        if cumulative * 2 >= total:
+            lower = buckets[index - 1] if index else 0
+            upper = buckets[index] if index < len(buckets) else None
+            return lower, upper
+    return None
+
+
+def dashboard_summary(days=30):
+    """Per-plan totals and daily rows of the last ``days`` days, cached briefly."""
+    cache_key = f"analysis:dashboard:{days}"
+    summary = cache.get(cache_key)
+    if summary is not None:
+        return summary
+
+    until = timezone.localdate()
+    since = until - timedelta(days=days - 1)
+    rows = (
+        DailyPlanStats.objects.filter(date__gte=since, date__lte=until)
+        .select_related("plan")
+        .order_by("date")
+    )
+
+    plans = defaultdict(
+        lambda: {
+            "invoices": 0,
+            "revenue": Decimal("0"),
+            "paid_invoices": 0,
+            "paid_revenue": Decimal("0"),
+            "started": 0,
+            "completed": 0,
+            "histogram": empty_completion_histogram(),
+            "daily": [],
+        }
+    )
+    for row in rows:
+        plan = plans[row.plan.name]
+        for field in (
+            "invoices",
+            "revenue",
+            "paid_invoices",
+            "paid_revenue",
+            "started",
+            "completed",
+        ):
+            plan[field] += getattr(row, field)
+        for index, count in enumerate(row.completion_minutes or ()):
+            plan["histogram"][index] += count
+        plan["daily"].append(
+            {
+                "date": row.date.isoformat(),
+                "invoices": row.invoices,
+                "revenue": str(row.revenue),
+                "paid_revenue": str(row.paid_revenue),
+                "started": row.started,
+                "completed": row.completed,
+            }
+        )
+
+    summary = {"from": since.isoformat(), "to": until.isoformat(), "plans": {}}
+    for name, plan in plans.items():
+        histogram = plan.pop("histogram")
+        summary["plans"][name] = {
+            **plan,
+            "revenue": str(plan["revenue"]),
+            "paid_revenue": str(plan["paid_revenue"]),
+            "start_rate": (
+                round(plan["started"] / plan["invoices"] * 100, 2)
+                if plan["invoices"]
+                else 0
+            ),
+            "completion_rate": (
+                round(plan["completed"] / plan["invoices"] * 100, 2)
+                if plan["invoices"]
+                else 0
+            ),
+            "median_minutes_to_complete": (
+                dict(zip(("from", "to"), median))
+                if (median := median_completion_range(histogram))
+                else None
+            ),
+        }
+
+    cache.set(cache_key, summary, DASHBOARD_CACHE_SECONDS)
+    return summary
@@ -0,0 +1,29 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from analysis.catalog import write_question_bundles
+
+
+class Command(BaseCommand):
+    help = (
+        "Write one JSON questionnaire bundle per plan and language for the current "
+        "catalog revision. collectstatic does this itself before collecting, so "
+        "this is only needed to inspect the bundles or with --collect."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--collect",
+            action="store_true",
+            help="Run collectstatic, which writes the bundles and collects them.",
+        )
+
+    def handle(self, *args, **options):
+        if options["collect"]:
+            call_command("collectstatic", interactive=False, verbosity=0)
+            self.stdout.write(
+                self.style.SUCCESS("Wrote bundles and collected static files.")
+            )
+            return
+        names = write_question_bundles()
+        self.stdout.write(f"Wrote {len(names)} bundles.")
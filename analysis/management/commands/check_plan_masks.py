@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from analysis.catalog import bump_catalog_revision, expected_plan_masks, sync_plan_masks
+from analysis.models import Question
+
+
+class Command(BaseCommand):
+    help = "Check that Question.plan_mask matches the question-plan M2M table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["fix"]:
+            fixed = sync_plan_masks()
+            if fixed:
+                bump_catalog_revision()
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(fixed)} questions."))
+            return
+
+        expected = expected_plan_masks()
+        stale = [
+            question_id
+            for question_id, mask in Question.objects.values_list("id", "plan_mask")
+            if mask != expected[question_id]
+        ]
+        if stale:
+            raise CommandError(
+                f"{len(stale)} questions have a stale plan_mask: {stale[:20]}. "
+                "Run with --fix."
+            )
+        self.stdout.write(self.style.SUCCESS("All plan masks are consistent."))
@@ -0,0 +1,39 @@
+from django.contrib.staticfiles.management.commands import collectstatic
+from django.db import DatabaseError
+
+from analysis.catalog import write_question_bundles
+
+
+class Command(collectstatic.Command):
+    help = (
+        "Write the questionnaire bundles of the current catalog revision, then "
+        "collect static files. Heroku runs this at build time, so the bundles "
+        "ship with the slug."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--no-bundles",
+            action="store_false",
+            dest="bundles",
+            help="Do not write the questionnaire bundles first.",
+        )
+
+    def set_options(self, **options):
+        super().set_options(**options)
+        self.bundles = options.get("bundles", True)
+
+    def collect(self):
+        if self.bundles and not self.dry_run:
+            try:
+                names = write_question_bundles()
+            except DatabaseError as exc:
+                # Without bundles QuestionsView links QuestionBundleView, which
+                # builds each bundle once per revision and caches it.
+                self.stderr.write(
+                    f"Question bundles not written, the database is unavailable: {exc}"
+                )
+            else:
+                self.log(f"Wrote {len(names)} question bundles.", level=1)
+        return super().collect()
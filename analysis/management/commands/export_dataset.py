@@ -0,0 +1,295 @@
+import csv
+import json
+import os
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analysis.api.utils import assessment_answer_pairs
+from analysis.models import Answer, Assessment, Question
+
+COLUMNS = [
+    "answer_id",
+    "invoice_id",
+    "invoice_uid",
+    "issued_date",
+    "is_paid",
+    "amount",
+    "plan",
+    "respondent_uid",
+    "question_id",
+    "question_priority",
+    "question_en",
+    "function_id",
+    "function_en",
+    "response",
+]
+
+
+class ChunkWriter:
+    """Write rows to numbered files, each renamed from ``.part`` once complete."""
+
+    extension = None
+
+    def __init__(self, directory, prefix, rows_per_file):
+        self.directory = directory
+        self.prefix = prefix
+        self.rows_per_file = rows_per_file
+        self.file_number = 0
+        self.rows_in_file = 0
+        self.path = None
+        self.files = []
+
+    def write(self, row):
+        if self.path is None:
+            self.file_number += 1
+            self.path = os.path.join(
+                self.directory,
+                f"{self.prefix}-{self.file_number:05d}.{self.extension}",
+            )
+            self.open(self.path + ".part")
+        self.write_row(row)
+        self.rows_in_file += 1
+        if self.rows_in_file >= self.rows_per_file:
+            self.close()
+            return True
+        return False
+
+    def close(self):
+        if self.path is None:
+            return
+        self.close_file()
+        os.replace(self.path + ".part", self.path)
+        self.files.append(self.path)
+        self.path = None
+        self.rows_in_file = 0
+
+
+class CsvWriter(ChunkWriter):
+    extension = "csv"
+
+    def open(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+
+    def write_row(self, row):
+        self.writer.writerow(row)
+
+    def close_file(self):
+        self.file.close()
+
+
+class NdjsonWriter(ChunkWriter):
+    extension = "ndjson"
+
+    def open(self, path):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write_row(self, row):
+        self.file.write(json.dumps(dict(zip(COLUMNS, row)), default=str) + "\n")
+
+    def close_file(self):
+        self.file.close()
+
+
+class ParquetWriter(ChunkWriter):
+    extension = "parquet"
+    row_group_size = 10000
+
+    def open(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema(
+            [
+                ("answer_id", pa.int64()),
+                ("invoice_id", pa.int64()),
+                ("invoice_uid", pa.string()),
+                ("issued_date", pa.date32()),
+                ("is_paid", pa.bool_()),
+                ("amount", pa.decimal128(10, 2)),
+                ("plan", pa.string()),
+                ("respondent_uid", pa.string()),
+                ("question_id", pa.int64()),
+                ("question_priority", pa.int64()),
+                ("question_en", pa.string()),
+                ("function_id", pa.int64()),
+                ("function_en", pa.string()),
+                ("response", pa.int64()),
+            ]
+        )
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.buffer = []
+
+    def write_row(self, row):
+        row = list(row)
+        for index in (2, 7):  # uuid columns
+            if row[index] is not None:
+                row[index] = str(row[index])
+        self.buffer.append(dict(zip(COLUMNS, row)))
+        if len(self.buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        self.writer.write_table(
+            self.pa.Table.from_pylist(self.buffer, schema=self.schema)
+        )
+        self.buffer = []
+
+    def close_file(self):
+        if self.buffer:
+            self.flush()
+        self.writer.close()
+
+
+WRITERS = {"csv": CsvWriter, "ndjson": NdjsonWriter, "parquet": ParquetWriter}
+
+# Answers committed shortly before a run may carry an older answered_at than
+# the run's start, so the window stops this far back.
+ANSWERED_AT_LAG = timedelta(minutes=5)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream every answer joined with its question, function, invoice and plan "
+        "into chunked CSV, NDJSON or Parquet files. With --incremental only rows "
+        "after the recorded checkpoint are exported; see --key for what that means."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output-dir", default="exports")
+        parser.add_argument("--format", choices=sorted(WRITERS), default="csv")
+        parser.add_argument(
+            "--key",
+            choices=["id", "answered_at"],
+            default="id",
+            help=(
+                "Incremental key. 'id' exports each Answer row once, by id; "
+                "answers replaced by a resubmission or import get new ids and "
+                "packed assessments are not seen. 'answered_at' re-exports the "
+                "complete current answers of every assessment answered since "
+                "the checkpoint, packed ones included, so an invoice can appear "
+                "in several runs: keep the rows of its latest run (replace by "
+                "invoice_id)."
+            ),
+        )
+        parser.add_argument("--incremental", action="store_true")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--rows-per-file", type=int, default=500000)
+
+    def handle(self, *args, **options):
+        if options["format"] == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise CommandError("Parquet export requires the pyarrow package.")
+
+        directory = options["output_dir"]
+        os.makedirs(directory, exist_ok=True)
+        checkpoint_path = os.path.join(directory, "checkpoint.json")
+        checkpoint = {}
+        if options["incremental"] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+
+        key = options["key"]
+        answers = Answer.objects.order_by("id")
+        packed = Assessment.objects.filter(packed_responses__isnull=False).order_by("id")
+        until = None
+        if key == "id":
+            answers = answers.filter(id__gt=checkpoint.get("last_id", 0))
+            packed = packed.none() if options["incremental"] else packed
+        else:
+            until = timezone.now() - ANSWERED_AT_LAG
+            answered = {"answered_at__lte": until}
+            if checkpoint.get("last_answered_at"):
+                answered["answered_at__gt"] = datetime.fromisoformat(
+                    checkpoint["last_answered_at"]
+                )
+            answers = answers.filter(
+                invoice__assessment__in=Assessment.objects.filter(**answered)
+            )
+            packed = packed.filter(**answered)
+
+        writer = WRITERS[options["format"]](
+            directory,
+            f"answers-{timezone.now():%Y%m%d-%H%M%S}",
+            options["rows_per_file"],
+        )
+        exported = 0
+        last_id = checkpoint.get("last_id", 0)
+
+        rows = answers.values_list(
+            "id",
+            "invoice_id",
+            "invoice__uid",
+            "invoice__issued_date",
+            "invoice__is_paid",
+            "invoice__amount",
+            "invoice__plan__name",
+            "respondent__uid",
+            "question_id",
+            "question__priority",
+            "question__en",
+            "question__function_id",
+            "question__function__en",
+            "response",
+        )
+        for row in rows.iterator(chunk_size=options["chunk_size"]):
+            exported += 1
+            last_id = row[0]
+            if writer.write(row) and key == "id":
+                self._save_checkpoint(checkpoint_path, checkpoint, last_id=last_id)
+                self.stdout.write(f"{exported} rows exported.")
+
+        if packed.exists():
+            questions = {
+                question_id: rest
+                for question_id, *rest in Question.objects.values_list(
+                    "id", "priority", "en", "function_id", "function__en"
+                )
+            }
+            for assessment in packed.select_related("invoice__plan").iterator(
+                chunk_size=options["chunk_size"]
+            ):
+                invoice = assessment.invoice
+                for question_id, response in assessment_answer_pairs(assessment):
+                    exported += 1
+                    writer.write(
+                        [
+                            None,
+                            invoice.id,
+                            invoice.uid,
+                            invoice.issued_date,
+                            invoice.is_paid,
+                            invoice.amount,
+                            invoice.plan.name,
+                            None,
+                            question_id,
+                            *questions.get(question_id, (None, None, None, None)),
+                            response,
+                        ]
+                    )
+
+        writer.close()
+        if key == "id":
+            self._save_checkpoint(checkpoint_path, checkpoint, last_id=last_id)
+        else:
+            self._save_checkpoint(
+                checkpoint_path, checkpoint, last_answered_at=until.isoformat()
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exported {exported} rows into {len(writer.files)} files in {directory}."
+            )
+        )
+
+    def _save_checkpoint(self, path, checkpoint, **values):
+        checkpoint.update(values, updated_at=timezone.now().isoformat())
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(path + ".tmp", path)
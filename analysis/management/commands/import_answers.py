@@ -0,0 +1,161 @@
+import csv
+import os
+import uuid
+from collections import defaultdict
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from analysis.api.utils import complete_assessment
+from analysis.choices import ANSWERS_CHOICES, PLAN_BITS
+from analysis.models import Answer, Assessment, Invoice, Plan, Question, Respondent
+
+
+def read_rows(path):
+    """Yield rows of a CSV or XLSX file one at a time."""
+    if path.lower().endswith(".xlsx"):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.reader(f)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import offline answers from a CSV or XLSX file with the columns "
+        "invoice uid, question id and response, then complete the assessments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.valid_responses = {value for value, _ in ANSWERS_CHOICES}
+        self.plan_questions = defaultdict(set)
+        plan_bits = {
+            plan_id: PLAN_BITS.get(name, 0)
+            for plan_id, name in Plan.objects.values_list("id", "name")
+        }
+        for question_id, plan_mask in Question.objects.values_list("id", "plan_mask"):
+            for plan_id, bit in plan_bits.items():
+                if plan_mask & bit:
+                    self.plan_questions[plan_id].add(question_id)
+
+        if not os.path.isfile(options["path"]):
+            raise CommandError(f"File not found: {options['path']}")
+        rows = enumerate(read_rows(options["path"]), start=1)
+
+        imported = errors = 0
+        touched_invoices = set()
+        while chunk := list(islice(rows, options["chunk_size"])):
+            answers, chunk_errors = self._validate_chunk(chunk)
+            for line, message in sorted(chunk_errors):
+                self.stderr.write(f"Row {line}: {message}")
+            errors += len(chunk_errors)
+
+            self._upsert(answers)
+            imported += len(answers)
+            touched_invoices.update(invoice_id for invoice_id, _ in answers)
+            self.stdout.write(f"{imported} answers imported, {errors} rows rejected.")
+
+        for invoice_id in touched_invoices:
+            complete_assessment(invoice_id)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {imported} answers for {len(touched_invoices)} invoices, "
+                f"{errors} rows rejected."
+            )
+        )
+
+    def _validate_chunk(self, chunk):
+        """Return ``{(invoice_id, question_id): response}`` and per-row errors."""
+        errors = []
+        parsed = []
+        for line, row in chunk:
+            row = [value for value in (row or ()) if value not in (None, "")]
+            if not row:
+                continue
+            if len(row) != 3:
+                errors.append((line, "expected invoice uid, question id and response."))
+                continue
+            # XLSX numbers arrive as floats; int() would truncate 3.7 to 3.
+            if any(
+                isinstance(value, float) and not value.is_integer() for value in row[1:]
+            ):
+                errors.append((line, f"question id and response must be whole numbers, got {row!r}."))
+                continue
+            try:
+                invoice_uid = uuid.UUID(str(row[0]).strip())
+                question_id = int(row[1])
+                response = int(row[2])
+            except (TypeError, ValueError):
+                if line == 1:
+                    continue  # header
+                errors.append((line, f"could not parse {row!r}."))
+                continue
+            parsed.append((line, invoice_uid, question_id, response))
+
+        invoices = {
+            uid: (invoice_id, plan_id)
+            for uid, invoice_id, plan_id in Invoice.objects.filter(
+                uid__in={invoice_uid for _, invoice_uid, _, _ in parsed}
+            ).values_list("uid", "id", "plan_id")
+        }
+        invoice_ids = [invoice_id for invoice_id, _ in invoices.values()]
+        packed_invoices = set(
+            Assessment.objects.filter(
+                invoice_id__in=invoice_ids, packed_responses__isnull=False
+            ).values_list("invoice_id", flat=True)
+        )
+        respondent_invoices = set(
+            Respondent.objects.filter(invoice_id__in=invoice_ids).values_list(
+                "invoice_id", flat=True
+            )
+        )
+
+        answers = {}
+        for line, invoice_uid, question_id, response in parsed:
+            if invoice_uid not in invoices:
+                errors.append((line, f"invoice {invoice_uid} not found."))
+                continue
+            invoice_id, plan_id = invoices[invoice_uid]
+            if invoice_id in packed_invoices:
+                errors.append((line, f"assessment of invoice {invoice_uid} is archived."))
+            elif invoice_id in respondent_invoices:
+                errors.append(
+                    (line, f"invoice {invoice_uid} collects answers per respondent.")
+                )
+            elif question_id not in self.plan_questions[plan_id]:
+                errors.append((line, f"question {question_id} is not in the invoice's plan."))
+            elif response not in self.valid_responses:
+                errors.append((line, f"response {response} is not a valid answer."))
+            else:
+                answers[(invoice_id, question_id)] = response
+        return answers, errors
+
+    def _upsert(self, answers):
+        questions_by_invoice = defaultdict(list)
+        for invoice_id, question_id in answers:
+            questions_by_invoice[invoice_id].append(question_id)
+
+        with transaction.atomic():
+            for invoice_id, question_ids in questions_by_invoice.items():
+                Answer.objects.filter(
+                    invoice_id=invoice_id, question_id__in=question_ids
+                ).delete()
+            Answer.objects.bulk_create(
+                (
+                    Answer(invoice_id=invoice_id, question_id=question_id, response=response)
+                    for (invoice_id, question_id), response in answers.items()
+                ),
+                batch_size=1000,
+            )
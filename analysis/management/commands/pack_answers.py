@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from analysis.api.utils import pack_assessment, unpack_assessment
+from analysis.models import Assessment
+
+
+class Command(BaseCommand):
+    help = (
+        "Pack the answers of completed assessments into compact columns and "
+        "delete their Answer rows. Use --unpack to restore the rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            help="Only assessments whose invoice was issued before this date (YYYY-MM-DD).",
+        )
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument("--unpack", action="store_true")
+
+    def handle(self, *args, **options):
+        assessments = Assessment.objects.filter(
+            packed_responses__isnull=not options["unpack"]
+        )
+        if not options["unpack"]:
+            assessments = assessments.filter(is_completed=True)
+        if options["before"]:
+            assessments = assessments.filter(invoice__issued_date__lt=options["before"])
+
+        if options["dry_run"]:
+            self.stdout.write(f"{assessments.count()} assessments would be processed.")
+            return
+
+        action = unpack_assessment if options["unpack"] else pack_assessment
+        processed = answers = skipped = 0
+        last_id = 0
+        while True:
+            batch = list(
+                assessments.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[: options["batch_size"]]
+            )
+            if not batch:
+                break
+            last_id = batch[-1]
+
+            for assessment_id in batch:
+                try:
+                    answers += action(assessment_id)
+                except ValueError as exc:
+                    skipped += 1
+                    self.stderr.write(f"Assessment {assessment_id} skipped: {exc}")
+                    continue
+                processed += 1
+
+            self.stdout.write(f"{processed} assessments processed so far.")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {processed} assessments, {answers} answers, {skipped} skipped."
+            )
+        )
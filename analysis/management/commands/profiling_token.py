@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from analysis.middleware import make_profile_token
+
+
+class Command(BaseCommand):
+    help = "Print a signed X-Profile header value that forces profiling of a request."
+
+    def handle(self, *args, **options):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            self.stderr.write("PROFILING_ENABLED is off; the token will be ignored.")
+        self.stdout.write(f"X-Profile: {make_profile_token()}")
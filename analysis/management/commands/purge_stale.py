@@ -0,0 +1,183 @@
+import json
+import os
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from analysis.dashboard import record_invoices_deleted
+from analysis.models import (
+    Answer,
+    Assessment,
+    FunctionResponseCount,
+    Invoice,
+    Respondent,
+)
+
+
+def stale_invoices(cutoff, include_paid=False, include_unfinished=False):
+    """
+    Invoices issued before ``cutoff`` that were never answered. With
+    ``include_unfinished`` also those whose assessment was started but not
+    completed. Completed assessments are never stale.
+    """
+    invoices = Invoice.objects.filter(issued_date__lt=cutoff)
+    if not include_paid:
+        invoices = invoices.filter(is_paid=False)
+
+    completed = Assessment.objects.filter(
+        invoice_id=OuterRef("id"), is_completed=True
+    )
+    invoices = invoices.exclude(Exists(completed))
+    if not include_unfinished:
+        invoices = invoices.exclude(
+            Exists(Assessment.objects.filter(invoice_id=OuterRef("id")))
+        ).exclude(Exists(Answer.objects.filter(invoice_id=OuterRef("id"))))
+    return invoices
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete invoices that were never answered, in small id-ordered batches "
+        "each in its own short transaction. They are taken out of the daily "
+        "rollup too, so it keeps matching rebuild_daily_stats."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Keep invoices issued in the last N days (default 90).",
+        )
+        parser.add_argument(
+            "--include-paid",
+            action="store_true",
+            help="Also purge paid invoices; by default only unpaid ones.",
+        )
+        parser.add_argument(
+            "--include-unfinished",
+            action="store_true",
+            help="Also purge invoices with a started but uncompleted assessment.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.5,
+            help="Seconds to sleep between batches.",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            help="Write the purged invoices and their answers to NDJSON here first.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["days"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--days and --batch-size must be positive.")
+
+        cutoff = timezone.localdate() - timedelta(days=options["days"])
+        invoices = stale_invoices(
+            cutoff, options["include_paid"], options["include_unfinished"]
+        )
+
+        if options["dry_run"]:
+            ids = invoices.values("id")
+            self.stdout.write(
+                f"Invoices issued before {cutoff} that would be purged: "
+                f"{invoices.count()} invoices, "
+                f"{Assessment.objects.filter(invoice_id__in=ids).count()} assessments, "
+                f"{Respondent.objects.filter(invoice_id__in=ids).count()} respondents, "
+                f"{Answer.objects.filter(invoice_id__in=ids).count()} answers."
+            )
+            return
+
+        archive = None
+        if options["archive_dir"]:
+            os.makedirs(options["archive_dir"], exist_ok=True)
+            archive_path = os.path.join(
+                options["archive_dir"],
+                f"purged-invoices-{timezone.now():%Y%m%d-%H%M%S}.ndjson",
+            )
+            archive = open(archive_path, "a", encoding="utf-8")
+
+        purged = answers = 0
+        last_id = 0
+        try:
+            while True:
+                batch = list(
+                    invoices.filter(id__gt=last_id)
+                    .order_by("id")
+                    .values_list("id", flat=True)[: options["batch_size"]]
+                )
+                if not batch:
+                    break
+                last_id = batch[-1]
+
+                deleted_invoices, deleted_answers = self._purge_batch(
+                    invoices, batch, archive
+                )
+                purged += deleted_invoices
+                answers += deleted_answers
+                self.stdout.write(
+                    f"{purged} invoices purged so far (last id {last_id})."
+                )
+                if options["pause"]:
+                    time.sleep(options["pause"])
+        finally:
+            if archive:
+                archive.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {purged} invoices and {answers} answers purged "
+                f"(issued before {cutoff})."
+            )
+        )
+
+    def _purge_batch(self, invoices, batch, archive):
+        """
+        Delete one batch children first, so the invoice delete has no cascade
+        left to collect. Rows are re-checked under lock in case an invoice
+        was answered since the batch was selected.
+        """
+        with transaction.atomic():
+            ids = list(
+                Invoice.objects.select_for_update()
+                .filter(id__in=invoices.filter(id__in=batch).values("id"))
+                .values_list("id", flat=True)
+            )
+            if not ids:
+                return 0, 0
+            if archive:
+                self._archive(archive, ids)
+
+            record_invoices_deleted(ids)
+            deleted_answers, _ = Answer.objects.filter(invoice_id__in=ids).delete()
+            FunctionResponseCount.objects.filter(invoice_id__in=ids).delete()
+            Respondent.objects.filter(invoice_id__in=ids).delete()
+            Assessment.objects.filter(invoice_id__in=ids).delete()
+            Invoice.objects.filter(id__in=ids).delete()
+        return len(ids), deleted_answers
+
+    def _archive(self, archive, ids):
+        answers = {}
+        for invoice_id, question_id, response in Answer.objects.filter(
+            invoice_id__in=ids
+        ).values_list("invoice_id", "question_id", "response"):
+            answers.setdefault(invoice_id, []).append([question_id, response])
+
+        for invoice in (
+            Invoice.objects.filter(id__in=ids)
+            .order_by("id")
+            .values("id", "uid", "plan__name", "amount", "issued_date", "is_paid")
+        ):
+            invoice["answers"] = answers.get(invoice["id"], [])
+            archive.write(json.dumps(invoice, cls=DjangoJSONEncoder) + "\n")
+        archive.flush()
+        os.fsync(archive.fileno())
@@ -0,0 +1,62 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from analysis.dashboard import completion_bucket, empty_completion_histogram
+from analysis.models import Assessment, DailyPlanStats, Invoice
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyPlanStats rollup from the Invoice and Assessment tables."
+
+    def handle(self, *args, **options):
+        rows = defaultdict(
+            lambda: DailyPlanStats(completion_minutes=empty_completion_histogram())
+        )
+
+        invoices = (
+            Invoice.objects.order_by()
+            .values("issued_date", "plan_id")
+            .annotate(
+                invoices=Count("id"),
+                revenue=Sum("amount"),
+                paid_invoices=Count("id", filter=Q(is_paid=True)),
+                paid_revenue=Sum("amount", filter=Q(is_paid=True)),
+            )
+        )
+        for group in invoices:
+            stats = rows[(group["issued_date"], group["plan_id"])]
+            stats.invoices = group["invoices"]
+            stats.revenue = group["revenue"] or 0
+            stats.paid_invoices = group["paid_invoices"]
+            stats.paid_revenue = group["paid_revenue"] or 0
+
+        assessments = Assessment.objects.values_list(
+            "invoice__issued_date",
+            "invoice__plan_id",
+            "is_completed",
+            "started_at",
+            "completed_at",
+        )
+        for issued_date, plan_id, is_completed, started_at, completed_at in (
+            assessments.iterator(chunk_size=2000)
+        ):
+            stats = rows[(issued_date, plan_id)]
+            stats.started += 1
+            if is_completed:
+                stats.completed += 1
+                if started_at and completed_at:
+                    minutes = (completed_at - started_at).total_seconds() / 60
+                    stats.completion_minutes[completion_bucket(minutes)] += 1
+
+        for (day, plan_id), stats in rows.items():
+            stats.date = day
+            stats.plan_id = plan_id
+
+        with transaction.atomic():
+            DailyPlanStats.objects.all().delete()
+            DailyPlanStats.objects.bulk_create(rows.values(), batch_size=500)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(rows)} daily rows."))
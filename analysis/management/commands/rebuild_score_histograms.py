@@ -0,0 +1,56 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from analysis.api.utils import build_assessment_results, score_buckets
+from analysis.models import Assessment, ScoreHistogram
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-plan score histograms from every completed assessment."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        counts = defaultdict(lambda: [0] * ScoreHistogram.BUCKETS)
+        contributions = {}
+
+        assessments = Assessment.objects.filter(is_completed=True).select_related(
+            "invoice__plan"
+        )
+        for assessment in assessments.iterator(chunk_size=options["batch_size"]):
+            buckets = score_buckets(build_assessment_results(assessment))
+            for key, bucket in buckets.items():
+                counts[(assessment.invoice.plan_id, key)][bucket] += 1
+            contributions[assessment.id] = buckets or None
+
+        histograms = [
+            ScoreHistogram(
+                plan_id=plan_id,
+                function_id=None if key == "overall" else int(key),
+                buckets=buckets,
+                total=sum(buckets),
+            )
+            for (plan_id, key), buckets in counts.items()
+        ]
+
+        with transaction.atomic():
+            ScoreHistogram.objects.all().delete()
+            ScoreHistogram.objects.bulk_create(histograms)
+            Assessment.objects.update(histogram_scores=None)
+            Assessment.objects.bulk_update(
+                [
+                    Assessment(id=assessment_id, histogram_scores=buckets)
+                    for assessment_id, buckets in contributions.items()
+                ],
+                ["histogram_scores"],
+                batch_size=options["batch_size"],
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {len(histograms)} histograms from {len(contributions)} assessments."
+            )
+        )
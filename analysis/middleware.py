@@ -0,0 +1,123 @@
+import cProfile
+import io
+import json
+import logging
+import marshal
+import pstats
+import random
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_SALT = "analysis.profiling"
+
+
+def make_profile_token():
+    """Signed value for the ``X-Profile`` header; see ``manage.py profiling_token``."""
+    return signing.TimestampSigner(salt=PROFILE_SALT).sign("profile")
+
+
+class RequestProfilingMiddleware:
+    """
+    Profile a request with cProfile and record its SQL when it carries a valid
+    ``X-Profile`` token or falls into the configured sample. Unless
+    PROFILING_ENABLED is set, Django drops the middleware at startup.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+        self.path_prefixes = tuple(getattr(settings, "PROFILING_PATH_PREFIXES", ("/",)))
+        self.token_max_age = getattr(settings, "PROFILING_TOKEN_MAX_AGE", 3600)
+
+    def __call__(self, request):
+        trigger = self._trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        queries = []
+
+        def log_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append(
+                    {
+                        "sql": sql,
+                        "params": repr(params),
+                        "many": many,
+                        "ms": round((time.perf_counter() - started) * 1000, 3),
+                    }
+                )
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with connection.execute_wrapper(log_query):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        try:
+            self._store(request, response, trigger, profiler, queries, duration_ms)
+        except Exception:
+            logger.exception("Could not store the profile of %s", request.path)
+        return response
+
+    def _trigger(self, request):
+        if not request.path.startswith(self.path_prefixes):
+            return None
+
+        token = request.META.get(PROFILE_HEADER)
+        if token:
+            try:
+                signing.TimestampSigner(salt=PROFILE_SALT).unsign(
+                    token, max_age=self.token_max_age
+                )
+                return "header"
+            except signing.BadSignature:
+                pass
+
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    def _store(self, request, response, trigger, profiler, queries, duration_ms):
+        from analysis.models import RequestProfile
+
+        summary = io.StringIO()
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.sort_stats("cumulative").print_stats(40)
+
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        record = RequestProfile(
+            method=request.method,
+            path=request.get_full_path()[:500],
+            status_code=response.status_code,
+            duration_ms=round(duration_ms, 3),
+            query_count=len(queries),
+            trigger=trigger,
+            summary=summary.getvalue(),
+        )
+        # Same format as Stats.dump_stats(), loadable by pstats or snakeviz.
+        record.profile.save(
+            f"{stamp}.prof", ContentFile(marshal.dumps(stats.stats)), save=False
+        )
+        record.sql_log.save(
+            f"{stamp}.sql.json",
+            ContentFile(json.dumps(queries, indent=2).encode("utf-8")),
+            save=False,
+        )
+        record.save()
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0007_alter_invoice_uid_assessment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessment',
+            name='packed_question_ids',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='assessment',
+            name='packed_responses',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
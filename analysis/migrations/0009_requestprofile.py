@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:48
+
+import analysis.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0008_assessment_packed_answers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=500)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.FloatField()),
+                ('query_count', models.PositiveIntegerField()),
+                ('trigger', models.CharField(max_length=20)),
+                ('summary', models.TextField(blank=True)),
+                ('profile', models.FileField(storage=analysis.models.profile_storage, upload_to='%Y/%m/%d/')),
+                ('sql_log', models.FileField(storage=analysis.models.profile_storage, upload_to='%Y/%m/%d/')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0009_requestprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessment',
+            name='histogram_scores',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ScoreHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('buckets', models.JSONField(default=list)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('function', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='score_histograms', to='analysis.function')),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_histograms', to='analysis.plan')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('function__isnull', False)), fields=('plan', 'function'), name='unique_function_score_histogram'), models.UniqueConstraint(condition=models.Q(('function__isnull', True)), fields=('plan',), name='unique_overall_score_histogram')],
+            },
+        ),
+    ]
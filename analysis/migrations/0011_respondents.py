@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:51
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0010_scorehistogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Respondent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uid', models.UUIDField(default=uuid.uuid4, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('is_completed', models.BooleanField(default=False)),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='respondents', to='analysis.invoice')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='answer',
+            name='respondent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='analysis.respondent'),
+        ),
+        migrations.CreateModel(
+            name='FunctionResponseCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('response', models.IntegerField(choices=[(1, 'Not Applicable'), (2, 'Not Implemented'), (3, 'Partially Implemented'), (4, 'Implemented and Functioning'), (5, 'Systematic and Innovative Implementation')])),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('function', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='response_counts', to='analysis.function')),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='response_counts', to='analysis.invoice')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('invoice', 'function', 'response'), name='unique_function_response_count')],
+            },
+        ),
+    ]
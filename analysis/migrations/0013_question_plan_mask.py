@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:54
+
+from django.db import migrations, models
+
+
+def populate_plan_masks(apps, schema_editor):
+    Question = apps.get_model("analysis", "Question")
+    # Bits follow the order of analysis.choices.PLAN_CHOICES at this migration.
+    plan_bits = {"basic": 1, "standard": 2, "premium": 4}
+
+    masks = {}
+    for question_id, plan_name in Question.plan.through.objects.values_list(
+        "question_id", "plan__name"
+    ):
+        masks[question_id] = masks.get(question_id, 0) | plan_bits.get(plan_name, 0)
+
+    by_mask = {}
+    for question_id, mask in masks.items():
+        by_mask.setdefault(mask, []).append(question_id)
+    for mask, question_ids in by_mask.items():
+        Question.objects.filter(id__in=question_ids).update(plan_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0012_catalogrevision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='plan_mask',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(populate_plan_masks, migrations.RunPython.noop),
+    ]
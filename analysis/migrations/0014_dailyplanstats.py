@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def populate_answered_at(apps, schema_editor):
+    """
+    Assessments completed before answer times were recorded count as
+    answered now, so the first answered_at export includes them.
+    """
+    Assessment = apps.get_model("analysis", "Assessment")
+    Assessment.objects.filter(is_completed=True).update(answered_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0013_question_plan_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessment',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='assessment',
+            name='answered_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='assessment',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='DailyPlanStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('invoices', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('paid_invoices', models.PositiveIntegerField(default=0)),
+                ('paid_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('started', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('completion_minutes', models.JSONField(blank=True, default=list)),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='analysis.plan')),
+            ],
+            options={
+                'verbose_name_plural': 'daily plan stats',
+                'ordering': ['-date', 'plan'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'plan'), name='unique_daily_plan_stats')],
+            },
+        ),
+        migrations.RunPython(populate_answered_at, migrations.RunPython.noop),
+    ]
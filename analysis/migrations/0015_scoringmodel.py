@@ -0,0 +1,100 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def create_default_scoring_model(apps, schema_editor):
+    Assessment = apps.get_model("analysis", "Assessment")
+    Question = apps.get_model("analysis", "Question")
+    ScoringModel = apps.get_model("analysis", "ScoringModel")
+    # Tables of analysis.scoring at this migration, and today's priorities,
+    # the ones existing results were scored with.
+    default = ScoringModel.objects.create(
+        plan=None,
+        version=1,
+        scores={"1": 0, "2": 25, "3": 50, "4": 75, "5": 100},
+        sentiments={
+            "1": "negative",
+            "2": "negative",
+            "3": "neutral",
+            "4": "positive",
+            "5": "positive",
+        },
+        sentiment_order=["negative", "neutral", "positive"],
+        priorities={
+            str(question_id): priority
+            for question_id, priority in Question.objects.values_list("id", "priority")
+        },
+    )
+    Assessment.objects.filter(is_completed=True).update(scoring_model=default)
+
+
+def populate_counter_weights(apps, schema_editor):
+    Answer = apps.get_model("analysis", "Answer")
+    FunctionResponseCount = apps.get_model("analysis", "FunctionResponseCount")
+    weights = (
+        Answer.objects.filter(
+            respondent__isnull=False,
+            invoice_id=OuterRef("invoice_id"),
+            question__function_id=OuterRef("function_id"),
+            response=OuterRef("response"),
+        )
+        .order_by()
+        .values("invoice_id")
+        .annotate(weight=Sum("question__priority"))
+        .values("weight")
+    )
+    FunctionResponseCount.objects.update(
+        weight=Coalesce(Subquery(weights), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0014_dailyplanstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='functionresponsecount',
+            name='weight',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ScoringModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('scores', models.JSONField(default=dict)),
+                ('sentiments', models.JSONField(default=dict)),
+                ('sentiment_order', models.JSONField(default=list)),
+                ('use_priority', models.BooleanField(default=False)),
+                ('priorities', models.JSONField(blank=True, default=dict)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('plan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='scoring_models', to='analysis.plan')),
+            ],
+            options={
+                'ordering': ['plan', '-version'],
+            },
+        ),
+        migrations.AddField(
+            model_name='assessment',
+            name='scoring_model',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='assessments', to='analysis.scoringmodel'),
+        ),
+        migrations.AddConstraint(
+            model_name='scoringmodel',
+            constraint=models.UniqueConstraint(condition=models.Q(('plan__isnull', False)), fields=('plan', 'version'), name='unique_plan_scoring_model_version'),
+        ),
+        migrations.AddConstraint(
+            model_name='scoringmodel',
+            constraint=models.UniqueConstraint(condition=models.Q(('plan__isnull', True)), fields=('version',), name='unique_default_scoring_model_version'),
+        ),
+        migrations.RunPython(create_default_scoring_model, migrations.RunPython.noop),
+        migrations.RunPython(populate_counter_weights, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
 from django.db import models
 
-from .choices import PLAN_CHOICES, ANSWERS_CHOICES
+from .choices import PLAN_CHOICES, ANSWERS_CHOICES, plan_masks_with
 import uuid
 
 
@@ -42,6 +45,13 @@ class Function(models.Model):
         return self.az
 
 
+class QuestionQuerySet(models.QuerySet):
+    def for_plan(self, plan):
+        """Questions of a plan (name or instance), filtered on plan_mask alone."""
+        plan_name = plan if isinstance(plan, str) else plan.name
+        return self.filter(plan_mask__in=plan_masks_with(plan_name))
+
+
 class Question(models.Model):
     """Sistem sualları (multilanguage ilə)."""
 
@@ -53,11 +63,108 @@ class Question(models.Model):
     ru = models.TextField()
     priority = models.IntegerField(default=1)
     plan = models.ManyToManyField(Plan, related_name="questions")
+    # Copy of `plan` as PLAN_BITS flags, kept in sync by analysis.signals so
+    # plan filters need no join; `manage.py check_plan_masks` verifies it.
+    plan_mask = models.PositiveSmallIntegerField(default=0, db_index=True)
+
+    objects = QuestionQuerySet.as_manager()
 
     def __str__(self):
         return self.en
 
 
+class CatalogRevision(models.Model):
+    """Sual kataloqunun versiyası: hər dəyişiklikdə artırılır."""
+
+    number = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Catalog revision {self.number}"
+
+
+class ScoringModel(models.Model):
+    """
+    Qiymətləndirmə modeli: cavab balları, sentiment qrupları və prioritet
+    çəkisi. Dəyişiklik yeni versiya kimi saxlanılır.
+    """
+
+    # Empty plan means the model applies to every plan without its own.
+    plan = models.ForeignKey(
+        Plan,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="scoring_models",
+    )
+    version = models.PositiveIntegerField(default=1)
+    scores = models.JSONField(default=dict)
+    sentiments = models.JSONField(default=dict)
+    sentiment_order = models.JSONField(default=list)
+    use_priority = models.BooleanField(default=False)
+    # Question id -> priority when the version was saved, so later priority
+    # edits do not change results scored with it.
+    priorities = models.JSONField(default=dict, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["plan", "-version"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["plan", "version"],
+                condition=models.Q(plan__isnull=False),
+                name="unique_plan_scoring_model_version",
+            ),
+            models.UniqueConstraint(
+                fields=["version"],
+                condition=models.Q(plan__isnull=True),
+                name="unique_default_scoring_model_version",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.plan or 'default'} scoring v{self.version}"
+
+    @staticmethod
+    def question_priorities():
+        """Current question priorities, in the form stored in ``priorities``."""
+        return {
+            str(question_id): priority
+            for question_id, priority in Question.objects.values_list("id", "priority")
+        }
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.priorities:
+            self.priorities = self.question_priorities()
+        super().save(*args, **kwargs)
+
+    def clean(self):
+        responses = {str(value) for value, _ in ANSWERS_CHOICES}
+        if set(map(str, self.scores)) != responses:
+            raise ValidationError({"scores": "Give a score for every answer value."})
+        if not set(map(str, self.sentiments)) <= responses:
+            raise ValidationError({"sentiments": "Keys must be answer values."})
+        if not set(self.sentiments.values()) <= set(self.sentiment_order):
+            raise ValidationError(
+                {"sentiment_order": "List every sentiment used in sentiments."}
+            )
+
+
+class Respondent(models.Model):
+    """Faktura üzrə sorğunu cavablandıran əməkdaşlar."""
+
+    uid = models.UUIDField(unique=True, default=uuid.uuid4)
+    invoice = models.ForeignKey(
+        Invoice, on_delete=models.CASCADE, related_name="respondents"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    is_completed = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"Respondent {self.uid} - {self.invoice}"
+
+
 class Answer(models.Model):
     """Cavablar."""
 
@@ -67,6 +174,13 @@ class Answer(models.Model):
     question = models.ForeignKey(
         Question, on_delete=models.CASCADE, related_name="answers"
     )
+    respondent = models.ForeignKey(
+        Respondent,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="answers",
+    )
     response = models.IntegerField(choices=ANSWERS_CHOICES)
 
     def __str__(self):
@@ -83,6 +197,151 @@ class Assessment(models.Model):
         Invoice, on_delete=models.CASCADE, related_name="assessment"
     )
     is_completed = models.BooleanField(default=False)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # Last time answers were submitted; incremental exports follow it.
+    answered_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Model the results are scored with, fixed at completion.
+    scoring_model = models.ForeignKey(
+        ScoringModel,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="assessments",
+    )
+    # Completed assessments can be archived into a compact form: question ids
+    # as little-endian uint32 and one response byte per question, same order.
+    packed_question_ids = models.BinaryField(null=True, blank=True)
+    packed_responses = models.BinaryField(null=True, blank=True)
+    # Histogram buckets this assessment contributed to ScoreHistogram, keyed by
+    # function id and "overall", so re-scoring can subtract them first.
+    histogram_scores = models.JSONField(null=True, blank=True)
 
     def __str__(self):
         return f"Assessment for {self.invoice} - Completed: {self.is_completed}"
+
+    @property
+    def is_packed(self):
+        return self.packed_responses is not None
+
+
+class FunctionResponseCount(models.Model):
+    """Faktura üzrə funksiya və cavab növünə görə cavab sayğacları."""
+
+    invoice = models.ForeignKey(
+        Invoice, on_delete=models.CASCADE, related_name="response_counts"
+    )
+    function = models.ForeignKey(
+        Function, on_delete=models.CASCADE, related_name="response_counts"
+    )
+    response = models.IntegerField(choices=ANSWERS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+    # Sum of the priorities of the counted answers' questions.
+    weight = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["invoice", "function", "response"],
+                name="unique_function_response_count",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.invoice} - {self.function_id}/{self.response}: {self.count}"
+
+
+class ScoreHistogram(models.Model):
+    """Plan üzrə bal histoqramı (funksiya və ya ümumi bal üçün)."""
+
+    BUCKETS = 101
+
+    plan = models.ForeignKey(
+        Plan, on_delete=models.CASCADE, related_name="score_histograms"
+    )
+    # Empty function means the histogram of the overall score.
+    function = models.ForeignKey(
+        Function,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="score_histograms",
+    )
+    buckets = models.JSONField(default=list)
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["plan", "function"],
+                condition=models.Q(function__isnull=False),
+                name="unique_function_score_histogram",
+            ),
+            models.UniqueConstraint(
+                fields=["plan"],
+                condition=models.Q(function__isnull=True),
+                name="unique_overall_score_histogram",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.plan} - {self.function or 'overall'} ({self.total})"
+
+
+class DailyPlanStats(models.Model):
+    """
+    Plan üzrə gündəlik göstəricilər: satış, başlanan və tamamlanan
+    qiymətləndirmələr (faktura tarixinə görə).
+    """
+
+    # Upper bounds, in minutes, of the time-to-completion histogram buckets.
+    COMPLETION_BUCKETS = [1, 2, 5, 10, 15, 30, 60, 120, 240, 480, 1440, 2880, 10080]
+
+    date = models.DateField()
+    plan = models.ForeignKey(Plan, on_delete=models.CASCADE, related_name="daily_stats")
+    invoices = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    paid_invoices = models.PositiveIntegerField(default=0)
+    paid_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    started = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    # Counts per COMPLETION_BUCKETS entry, plus one for anything longer.
+    completion_minutes = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        ordering = ["-date", "plan"]
+        verbose_name_plural = "daily plan stats"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "plan"], name="unique_daily_plan_stats"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.plan}"
+
+
+def profile_storage():
+    """Profiles live outside MEDIA_ROOT; the admin serves them to staff."""
+    return FileSystemStorage(location=settings.PROFILING_ROOT, base_url=None)
+
+
+class RequestProfile(models.Model):
+    """Sorğu profilləri (cProfile nəticəsi və SQL jurnalı)."""
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    trigger = models.CharField(max_length=20)
+    summary = models.TextField(blank=True)
+    profile = models.FileField(upload_to="%Y/%m/%d/", storage=profile_storage)
+    sql_log = models.FileField(upload_to="%Y/%m/%d/", storage=profile_storage)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,129 @@
+import threading
+from collections import namedtuple
+from typing import Dict, List
+
+from django.db.models import F, Q
+
+from analysis.models import Assessment, ScoringModel
+
+# Built-in model, used until a ScoringModel row exists.
+SCORE_MAP: Dict[int, int] = {1: 0, 2: 25, 3: 50, 4: 75, 5: 100}
+SENTIMENT_MAP: Dict[int, str] = {
+    1: "negative",
+    2: "negative",
+    3: "neutral",
+    4: "positive",
+    5: "positive",
+}
+SENTIMENT_ORDER: List[str] = ["negative", "neutral", "positive"]
+
+# Weight of a question missing from a model's priority snapshot, i.e. added
+# after the version was saved.
+DEFAULT_QUESTION_WEIGHT = 1
+
+# `scores` and `sentiments` are tuples indexed by the response value;
+# `priorities` maps question ids to the weights snapshotted with the version.
+CompiledScoring = namedtuple(
+    "CompiledScoring",
+    [
+        "model_id",
+        "version",
+        "scores",
+        "sentiments",
+        "sentiment_order",
+        "use_priority",
+        "priorities",
+    ],
+)
+
+
+def compile_scoring(
+    model_id, version, scores, sentiments, sentiment_order, use_priority, priorities=None
+):
+    scores = {int(value): score for value, score in scores.items()}
+    sentiments = {int(value): sentiment for value, sentiment in sentiments.items()}
+    size = max([*scores, *sentiments], default=0) + 1
+    return CompiledScoring(
+        model_id=model_id,
+        version=version,
+        scores=tuple(scores.get(value, 0) for value in range(size)),
+        sentiments=tuple(sentiments.get(value) for value in range(size)),
+        sentiment_order=tuple(sentiment_order),
+        use_priority=use_priority,
+        priorities={
+            int(question_id): weight
+            for question_id, weight in (priorities or {}).items()
+        },
+    )
+
+
+DEFAULT_SCORING = compile_scoring(
+    None, 0, SCORE_MAP, SENTIMENT_MAP, SENTIMENT_ORDER, False
+)
+
+_compiled: Dict[int, CompiledScoring] = {}
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_scoring(model_id):
+    """Compiled tables of a model; versions are immutable, so they are cached."""
+    if model_id is None:
+        return DEFAULT_SCORING
+    compiled = _compiled.get(model_id)
+    if compiled is None:
+        model = ScoringModel.objects.get(id=model_id)
+        compiled = compile_scoring(
+            model.id,
+            model.version,
+            model.scores,
+            model.sentiments,
+            model.sentiment_order,
+            model.use_priority,
+            model.priorities,
+        )
+        with _compiled_lock:
+            _compiled[model_id] = compiled
+    return compiled
+
+
+def invalidate_compiled_scoring(model_id):
+    with _compiled_lock:
+        _compiled.pop(model_id, None)
+
+
+def active_scoring_model_id(plan_id):
+    """The plan's active model, else the active default one, else None (built-in)."""
+    return (
+        ScoringModel.objects.filter(
+            Q(plan_id=plan_id) | Q(plan__isnull=True), is_active=True
+        )
+        .order_by(F("plan_id").asc(nulls_last=True), "-version")
+        .values_list("id", flat=True)
+        .first()
+    )
+
+
+def question_weight(scoring, question_id):
+    return scoring.priorities.get(question_id, DEFAULT_QUESTION_WEIGHT)
+
+
+def scoring_for_invoice(invoice_id, plan_id):
+    """Scoring of the invoice's assessment, without loading the assessment."""
+    state = (
+        Assessment.objects.filter(invoice_id=invoice_id)
+        .values_list("is_completed", "scoring_model_id")
+        .first()
+    )
+    if state is not None and state[0]:
+        return get_compiled_scoring(state[1])
+    return get_compiled_scoring(active_scoring_model_id(plan_id))
+
+
+def scoring_for_assessment(assessment):
+    """
+    Completed assessments keep the model pinned at completion (the built-in one
+    if none was pinned); unfinished ones preview with the active model.
+    """
+    if assessment.is_completed:
+        return get_compiled_scoring(assessment.scoring_model_id)
+    return get_compiled_scoring(active_scoring_model_id(assessment.invoice.plan_id))
@@ -0,0 +1,132 @@
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+from analysis.catalog import LANGUAGES, get_catalog_revision
+from analysis.choices import PLAN_BITS
+from analysis.models import Question
+
+# Letters NFKD does not decompose into a base letter plus a combining mark.
+_FOLD = str.maketrans({"ə": "e", "ı": "i", "ё": "е", "ß": "ss"})
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize(text):
+    """
+    Fold case and diacritics so "Əmək", "emek" and "ƏMƏK" match, and
+    Cyrillic "ё" matches "е".
+    """
+    text = unicodedata.normalize("NFKD", (text or "").casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return text.translate(_FOLD)
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+class QuestionIndex:
+    """In-memory prefix index over question and function texts in every language."""
+
+    def __init__(self, revision, questions):
+        self.revision = revision
+        self.questions = {}
+        postings = defaultdict(set)
+        for question in questions:
+            self.questions[question["id"]] = question
+            for language in LANGUAGES:
+                for field in (question[language], question["function"][language]):
+                    for token in tokenize(field):
+                        postings[token].add(question["id"])
+        self.postings = dict(postings)
+        self.tokens = sorted(self.postings)
+
+    @classmethod
+    def build(cls, revision):
+        questions = []
+        rows = Question.objects.values_list(
+            "id",
+            "az",
+            "en",
+            "ru",
+            "priority",
+            "function_id",
+            "function__az",
+            "function__en",
+            "function__ru",
+            "plan_mask",
+        )
+        for (
+            question_id,
+            az,
+            en,
+            ru,
+            priority,
+            function_id,
+            function_az,
+            function_en,
+            function_ru,
+            plan_mask,
+        ) in rows:
+            questions.append(
+                {
+                    "id": question_id,
+                    "az": az,
+                    "en": en,
+                    "ru": ru,
+                    "priority": priority,
+                    "function": {
+                        "id": function_id,
+                        "az": function_az,
+                        "en": function_en,
+                        "ru": function_ru,
+                    },
+                    "plans": [
+                        name for name, bit in PLAN_BITS.items() if plan_mask & bit
+                    ],
+                }
+            )
+        return cls(revision, questions)
+
+    def _matching(self, term):
+        ids = set()
+        position = bisect_left(self.tokens, term)
+        while position < len(self.tokens) and self.tokens[position].startswith(term):
+            ids |= self.postings[self.tokens[position]]
+            position += 1
+        return ids
+
+    def search(self, query, plan=None, limit=None):
+        """Ids of questions containing every query word (as a word prefix)."""
+        matches = None
+        for term in tokenize(query):
+            ids = self._matching(term)
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+        if matches is None:
+            return []
+        if plan:
+            matches = [
+                question_id
+                for question_id in matches
+                if plan in self.questions[question_id]["plans"]
+            ]
+        return sorted(matches)[:limit]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_question_index():
+    """Return the index, rebuilding it when the catalog revision has moved on."""
+    global _index
+    revision = get_catalog_revision()
+    if _index is None or _index.revision != revision:
+        with _index_lock:
+            if _index is None or _index.revision != revision:
+                _index = QuestionIndex.build(revision)
+    return _index
@@ -0,0 +1,76 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from analysis.api.utils import forget_invoice
+from analysis.catalog import bump_catalog_revision, sync_plan_masks
+from analysis.dashboard import record_daily_stats, record_invoice_change
+from analysis.models import Function, Invoice, Question, ScoringModel
+from analysis.scoring import invalidate_compiled_scoring
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Function)
+@receiver(post_delete, sender=Function)
+def catalog_changed(sender, **kwargs):
+    bump_catalog_revision()
+
+
+@receiver(post_save, sender=ScoringModel)
+@receiver(post_delete, sender=ScoringModel)
+def scoring_model_changed(sender, instance, **kwargs):
+    invalidate_compiled_scoring(instance.pk)
+
+
+@receiver(m2m_changed, sender=Question.plan.through)
+def question_plans_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # Clearing from the Plan side does not report which questions changed.
+        instance._cleared_question_ids = list(
+            instance.questions.values_list("id", flat=True)
+        )
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        question_ids = [instance.pk]
+    elif action == "post_clear":
+        question_ids = getattr(instance, "_cleared_question_ids", [])
+    else:
+        question_ids = list(pk_set or ())
+    sync_plan_masks(question_ids)
+    bump_catalog_revision()
+
+
+@receiver(pre_save, sender=Invoice)
+def remember_invoice_rollup_fields(sender, instance, **kwargs):
+    instance._rollup_previous = (
+        Invoice.objects.filter(pk=instance.pk)
+        .values("issued_date", "plan_id", "amount", "is_paid")
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Invoice)
+def invoice_saved(sender, instance, created, **kwargs):
+    if created:
+        paid = 1 if instance.is_paid else 0
+        record_daily_stats(
+            instance.issued_date,
+            instance.plan_id,
+            invoices=1,
+            revenue=instance.amount,
+            paid_invoices=paid,
+            paid_revenue=instance.amount * paid,
+        )
+    elif instance._rollup_previous is not None:
+        record_invoice_change(instance._rollup_previous, instance)
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def forget_cached_invoice(sender, instance, **kwargs):
+    forget_invoice(instance.uid)
@@ -0,0 +1,52 @@
+from django.test import Client, TestCase
+
+from analysis.api import views
+from analysis.models import Invoice, Plan, Question
+
+
+class CatalogTestCase(TestCase):
+    """Plans and the shipped question catalog, plus helpers to answer it."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ("basic", "standard", "premium"):
+            Plan.objects.create(name=name, price=10)
+        views.create_functions(None)
+        views.create_questions(None)
+
+    def setUp(self):
+        self.client = Client(HTTP_HOST="hrdio.vercel.app")
+
+    def new_invoice(self, plan="basic", **kwargs):
+        return Invoice.objects.create(
+            plan=Plan.objects.get(name=plan), amount=10, **kwargs
+        )
+
+    def question_ids(self, plan="basic"):
+        return list(
+            Question.objects.for_plan(plan).order_by("id").values_list("id", flat=True)
+        )
+
+    def answer(self, invoice, response=lambda index: index % 5 + 1):
+        payload = [
+            {"question_id": question_id, "answer_id": response(index)}
+            for index, question_id in enumerate(self.question_ids(invoice.plan.name))
+        ]
+        return self.client.post(
+            f"/analysis/start/{invoice.uid}", payload, content_type="application/json"
+        )
+
+    def respond(self, invoice, response=lambda index: index % 5 + 1):
+        uid = self.client.post(f"/analysis/respondents/{invoice.uid}").json()["uid"]
+        payload = [
+            {"question_id": question_id, "answer_id": response(index)}
+            for index, question_id in enumerate(self.question_ids(invoice.plan.name))
+        ]
+        return self.client.post(
+            f"/analysis/respond/{uid}", payload, content_type="application/json"
+        )
+
+    def results(self, invoice):
+        response = self.client.get(f"/analysis/result/{invoice.uid}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
@@ -0,0 +1,105 @@
+from django.test import SimpleTestCase
+
+from analysis.api.utils import decode_compact_responses
+from analysis.catalog import CANONICAL_ORDER, get_catalog_revision
+from analysis.models import Answer, Question
+
+from .base import CatalogTestCase
+
+
+class DecodeCompactResponsesTests(SimpleTestCase):
+    question_ids = [7, 3, 9, 4]
+
+    def test_digit_string_and_list_skip_unanswered(self):
+        expected = [(7, 3), (9, 5), (4, 1)]
+
+        self.assertEqual(decode_compact_responses("3051", self.question_ids), expected)
+        self.assertEqual(
+            decode_compact_responses([3, 0, 5, 1], self.question_ids), expected
+        )
+
+    def test_invalid_responses_raise_value_error(self):
+        for responses in (
+            "305",
+            [3, 0, 5, 1, 2],
+            "3061",
+            "3a51",
+            "3é51",
+            [3, 0, 6, 1],
+            [3, 0, -1, 1],
+            [3, 0, 10**30, 1],
+            [3, 0, -(10**30), 1],
+            [3, 0, True, 1],
+            [3, 0, 5.0, 1],
+            {"0": 3},
+        ):
+            with self.subTest(responses=responses):
+                with self.assertRaises(ValueError):
+                    decode_compact_responses(responses, self.question_ids)
+
+
+class CompactSubmissionTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.invoice = self.new_invoice()
+
+    def submit(self, payload):
+        return self.client.post(
+            f"/analysis/start/{self.invoice.uid}",
+            payload,
+            content_type="application/json",
+        )
+
+    def canonical_ids(self):
+        return list(
+            Question.objects.for_plan("basic")
+            .order_by(*CANONICAL_ORDER)
+            .values_list("id", flat=True)
+        )
+
+    def test_responses_follow_the_canonical_order(self):
+        response = self.client.get(f"/analysis/questions/{self.invoice.uid}")
+        version = int(response["X-Catalog-Version"])
+        questions = [question["id"] for question in response.json()]
+        self.assertEqual(questions, self.canonical_ids())
+        responses = "".join(str(index % 6) for index in range(len(questions)))
+
+        response = self.submit({"catalog_version": version, "responses": responses})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(
+                Answer.objects.filter(invoice=self.invoice).values_list(
+                    "question_id", "response"
+                )
+            ),
+            sorted(
+                (question_id, index % 6)
+                for index, question_id in enumerate(self.canonical_ids())
+                if index % 6
+            ),
+        )
+
+    def test_stale_version_is_rejected_with_the_current_one(self):
+        version = get_catalog_revision()
+        responses = "3" * len(self.canonical_ids())
+        # An editor saves a question, which bumps the catalog revision.
+        Question.objects.get(id=self.canonical_ids()[0]).save()
+
+        response = self.submit({"catalog_version": version, "responses": responses})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["catalog_version"], get_catalog_revision())
+        self.assertNotEqual(get_catalog_revision(), version)
+        self.assertFalse(Answer.objects.filter(invoice=self.invoice).exists())
+
+    def test_out_of_range_integers_are_a_bad_request(self):
+        responses = [3] * len(self.canonical_ids())
+        responses[0] = 10**30
+
+        response = self.submit(
+            {"catalog_version": get_catalog_revision(), "responses": responses}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Answer.objects.filter(invoice=self.invoice).exists())
@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+
+from analysis.models import DailyPlanStats
+
+from .base import CatalogTestCase
+
+
+class DailyRollupTests(CatalogTestCase):
+    def test_incremental_rollup_matches_rebuild(self):
+        invoices = [self.new_invoice(plan) for plan in ("basic", "basic", "premium")]
+        self.answer(invoices[0])
+        self.client.get(f"/analysis/questions/{invoices[1].uid}")
+
+        invoices[1].is_paid = False
+        invoices[1].amount = 25
+        invoices[1].save()
+        invoices[2].plan_id = invoices[0].plan_id
+        invoices[2].save()
+
+        fields = (
+            "date",
+            "plan_id",
+            "invoices",
+            "revenue",
+            "paid_invoices",
+            "paid_revenue",
+            "started",
+            "completed",
+            "completion_minutes",
+        )
+        incremental = sorted(
+            row
+            for row in DailyPlanStats.objects.values_list(*fields)
+            if any(row[2:8])
+        )
+        call_command("rebuild_daily_stats", stdout=StringIO())
+        self.assertEqual(sorted(DailyPlanStats.objects.values_list(*fields)), incremental)
+
+
+class DashboardViewTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_staff_session_reads_the_dashboard(self):
+        self.new_invoice("premium")
+        self.client.force_login(User.objects.create_user("ops", is_staff=True))
+
+        response = self.client.get("/analysis/dashboard/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["plans"]["premium"]["invoices"], 1)
+
+    def test_requires_a_staff_session(self):
+        self.assertEqual(self.client.get("/analysis/dashboard/").status_code, 403)
+
+        self.client.force_login(User.objects.create_user("customer"))
+        self.assertEqual(self.client.get("/analysis/dashboard/").status_code, 403)
@@ -0,0 +1,36 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from analysis.api.utils import record_assessment_scores
+from analysis.models import Answer, Assessment, ScoreHistogram
+
+from .base import CatalogTestCase
+
+
+def histogram_state():
+    return sorted(
+        (histogram.plan_id, histogram.function_id or 0, histogram.total, histogram.buckets)
+        for histogram in ScoreHistogram.objects.all()
+    )
+
+
+class ScoreHistogramTests(CatalogTestCase):
+    def test_resubmission_moves_the_assessment_between_buckets(self):
+        invoice = self.new_invoice()
+        self.answer(invoice, lambda index: 1)
+        first = histogram_state()
+
+        Answer.objects.filter(invoice=invoice).delete()
+        self.answer(invoice, lambda index: 5)
+
+        overall = ScoreHistogram.objects.get(function__isnull=True)
+        self.assertEqual(overall.total, 1)
+        self.assertEqual(overall.buckets[100], 1)
+        self.assertNotEqual(histogram_state(), first)
+
+        # Recording again, or rebuilding from scratch, changes nothing.
+        record_assessment_scores(Assessment.objects.get(invoice=invoice).id)
+        incremental = histogram_state()
+        call_command("rebuild_score_histograms", stdout=StringIO())
+        self.assertEqual(histogram_state(), incremental)
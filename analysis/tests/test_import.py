@@ -0,0 +1,63 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from openpyxl import Workbook
+
+from analysis.models import Answer, Assessment
+
+from .base import CatalogTestCase
+
+
+class ImportAnswersTests(CatalogTestCase):
+    def import_rows(self, rows):
+        workbook = Workbook()
+        for row in rows:
+            workbook.active.append(row)
+        handle, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        workbook.save(path)
+
+        stderr = StringIO()
+        call_command("import_answers", path, stdout=StringIO(), stderr=stderr)
+        return stderr.getvalue()
+
+    def test_imports_rows_and_completes_the_assessment(self):
+        invoice = self.new_invoice()
+        first, second = self.question_ids()[:2]
+
+        errors = self.import_rows(
+            [
+                ["invoice", "question", "response"],
+                [str(invoice.uid), first, 3],
+                [str(invoice.uid), second, 4.0],
+            ]
+        )
+
+        self.assertEqual(errors, "")
+        self.assertEqual(
+            sorted(
+                Answer.objects.filter(invoice=invoice).values_list(
+                    "question_id", "response"
+                )
+            ),
+            [(first, 3), (second, 4)],
+        )
+        self.assertTrue(Assessment.objects.get(invoice=invoice).is_completed)
+
+    def test_fractional_numbers_are_rejected_not_truncated(self):
+        invoice = self.new_invoice()
+        first, second = self.question_ids()[:2]
+
+        errors = self.import_rows(
+            [
+                [str(invoice.uid), first, 3.7],
+                [str(invoice.uid), second + 0.5, 3],
+            ]
+        )
+
+        self.assertIn("Row 1: question id and response must be whole numbers", errors)
+        self.assertIn("Row 2: question id and response must be whole numbers", errors)
+        self.assertFalse(Answer.objects.filter(invoice=invoice).exists())
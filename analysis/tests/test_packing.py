@@ -0,0 +1,49 @@
+from analysis.api.utils import pack_assessment, unpack_assessment
+from analysis.models import Answer, Assessment
+
+from .base import CatalogTestCase
+
+
+class PackAnswersTests(CatalogTestCase):
+    def test_round_trip_keeps_results(self):
+        invoice = self.new_invoice("premium")
+        self.answer(invoice)
+        assessment = Assessment.objects.get(invoice=invoice)
+        answers = sorted(
+            Answer.objects.filter(invoice=invoice).values_list("question_id", "response")
+        )
+        before = self.results(invoice)
+
+        packed = pack_assessment(assessment.id)
+
+        self.assertEqual(packed, len(answers))
+        self.assertFalse(Answer.objects.filter(invoice=invoice).exists())
+        self.assertEqual(self.results(invoice), before)
+
+        unpack_assessment(assessment.id)
+
+        self.assertEqual(
+            sorted(
+                Answer.objects.filter(invoice=invoice).values_list(
+                    "question_id", "response"
+                )
+            ),
+            answers,
+        )
+        self.assertFalse(Assessment.objects.get(id=assessment.id).is_packed)
+        self.assertEqual(self.results(invoice), before)
+
+    def test_incomplete_assessment_is_not_packed(self):
+        invoice = self.new_invoice()
+        self.client.get(f"/analysis/questions/{invoice.uid}")
+        assessment = Assessment.objects.get(invoice=invoice)
+
+        with self.assertRaises(ValueError):
+            pack_assessment(assessment.id)
+
+    def test_packed_assessment_rejects_new_answers(self):
+        invoice = self.new_invoice()
+        self.answer(invoice)
+        pack_assessment(Assessment.objects.get(invoice=invoice).id)
+
+        self.assertEqual(self.answer(invoice).status_code, 409)
@@ -0,0 +1,35 @@
+from django.contrib.auth.models import User
+
+from analysis.models import Question
+
+from .base import CatalogTestCase
+
+
+class PlanMaskTests(CatalogTestCase):
+    def test_plan_mask_is_not_serialized(self):
+        invoice = self.new_invoice("premium")
+
+        response = self.client.get(f"/analysis/questions/{invoice.uid}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), len(self.question_ids("premium")))
+        self.assertNotIn("plan_mask", response.json()[0])
+        self.assertIn("plan", response.json()[0])
+
+    def test_admin_plan_filter_uses_the_mask(self):
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "secret")
+        )
+
+        for plan in ("basic", "premium"):
+            with self.subTest(plan=plan):
+                response = self.client.get("/admin/analysis/question/", {"plan": plan})
+                changelist = response.context["cl"]
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    changelist.result_count,
+                    Question.objects.filter(plan__name=plan).count(),
+                )
+                self.assertNotIn(
+                    "analysis_question_plan", str(changelist.queryset.query)
+                )
@@ -0,0 +1,88 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from analysis.management.commands.purge_stale import Command, stale_invoices
+from analysis.models import Answer, DailyPlanStats, Invoice, Question
+
+from .base import CatalogTestCase
+
+
+class PurgeStaleTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cutoff = timezone.localdate() - timedelta(days=90)
+        self.old = []
+        for _ in range(3):
+            invoice = self.new_invoice(is_paid=False)
+            self.old.append(invoice)
+        self.paid = self.new_invoice()
+        self.completed = self.new_invoice(is_paid=False)
+        self.answer(self.completed)
+        Invoice.objects.update(issued_date=self.cutoff - timedelta(days=1))
+        self.recent = self.new_invoice(is_paid=False)
+
+    def rollup(self):
+        return sorted(
+            row
+            for row in DailyPlanStats.objects.values_list(
+                "date",
+                "plan_id",
+                "invoices",
+                "revenue",
+                "paid_invoices",
+                "paid_revenue",
+                "started",
+                "completed",
+                "completion_minutes",
+            )
+            if any(row[2:8])
+        )
+
+    def purge(self, **options):
+        call_command("purge_stale", pause=0, stdout=StringIO(), **options)
+
+    def test_dry_run_deletes_nothing(self):
+        self.purge(dry_run=True)
+
+        self.assertEqual(Invoice.objects.count(), 6)
+
+    def test_purges_only_stale_invoices(self):
+        self.purge(batch_size=2)
+
+        self.assertEqual(
+            set(Invoice.objects.values_list("id", flat=True)),
+            {self.paid.id, self.completed.id, self.recent.id},
+        )
+
+    def test_batch_rechecks_invoices_answered_since_selection(self):
+        batch = list(
+            stale_invoices(self.cutoff).order_by("id").values_list("id", flat=True)
+        )
+        self.assertEqual(batch, [invoice.id for invoice in self.old])
+
+        # Answered after the batch was selected, before it is deleted.
+        Answer.objects.create(
+            invoice=self.old[0], question=Question.objects.first(), response=3
+        )
+        purged, _ = Command()._purge_batch(stale_invoices(self.cutoff), batch, None)
+
+        self.assertEqual(purged, 2)
+        self.assertTrue(Invoice.objects.filter(id=self.old[0].id).exists())
+        self.assertEqual(Answer.objects.filter(invoice=self.old[0]).count(), 1)
+
+    def test_rollup_matches_a_rebuild_after_purging(self):
+        # A started but unfinished assessment, purged with --include-unfinished.
+        self.client.get(f"/analysis/questions/{self.old[1].uid}")
+        # setUp backdated the invoices with update(), which the rollup missed.
+        call_command("rebuild_daily_stats", stdout=StringIO())
+        before = self.rollup()
+
+        self.purge(include_unfinished=True)
+
+        incremental = self.rollup()
+        self.assertNotEqual(incremental, before)
+        call_command("rebuild_daily_stats", stdout=StringIO())
+        self.assertEqual(self.rollup(), incremental)
@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.test import Client, TransactionTestCase
+
+from analysis.api import utils
+from analysis.api.utils import InvoiceKey, resolve_assessment, resolve_invoice
+from analysis.models import Assessment, Invoice, Plan
+
+from .base import CatalogTestCase
+
+
+def cached(invoice):
+    return utils._cached_invoice_key(invoice.uid)
+
+
+class InvoiceResolverTests(CatalogTestCase):
+    def test_repeat_lookups_hit_the_cache(self):
+        invoice = self.new_invoice("premium")
+
+        with self.assertNumQueries(1):
+            key = resolve_invoice(invoice.uid)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_invoice(invoice.uid), key)
+        self.assertEqual(key, InvoiceKey(invoice.id, invoice.plan_id, "premium"))
+
+    def test_least_recently_used_invoice_is_evicted(self):
+        invoices = [self.new_invoice() for _ in range(3)]
+
+        with mock.patch.object(utils, "INVOICE_CACHE_SIZE", 2):
+            resolve_invoice(invoices[0].uid)
+            resolve_invoice(invoices[1].uid)
+            resolve_invoice(invoices[0].uid)
+            resolve_invoice(invoices[2].uid)
+
+        self.assertIsNotNone(cached(invoices[0]))
+        self.assertIsNone(cached(invoices[1]))
+        self.assertIsNotNone(cached(invoices[2]))
+
+    def test_save_and_delete_evict_the_invoice(self):
+        invoice = self.new_invoice()
+        resolve_invoice(invoice.uid)
+
+        invoice.plan = Plan.objects.get(name="premium")
+        invoice.save()
+        self.assertIsNone(cached(invoice))
+        self.assertEqual(resolve_invoice(invoice.uid).plan_name, "premium")
+
+        invoice.delete()
+        self.assertIsNone(cached(invoice))
+        with self.assertRaises(Invoice.DoesNotExist):
+            resolve_invoice(invoice.uid)
+
+    def test_resolve_assessment_requires_completion_when_asked(self):
+        invoice = self.new_invoice()
+        self.client.get(f"/analysis/questions/{invoice.uid}")
+
+        self.assertEqual(resolve_assessment(invoice.uid).invoice_id, invoice.id)
+        with self.assertRaises(Assessment.DoesNotExist):
+            resolve_assessment(invoice.uid, completed=True)
+
+    def test_invoice_deleted_by_another_process_is_not_found(self):
+        invoice = self.new_invoice()
+        resolve_invoice(invoice.uid)
+        invoice.delete()
+
+        for url in (
+            f"/analysis/start/{invoice.uid}",
+            f"/analysis/respondents/{invoice.uid}",
+        ):
+            with self.subTest(url=url):
+                # Another process still has it cached.
+                utils._remember_invoice(invoice)
+                response = self.client.post(url, [], content_type="application/json")
+                self.assertEqual(response.status_code, 404)
+                self.assertIsNone(cached(invoice))
+
+
+class DeletedInvoiceQuestionsTests(TransactionTestCase):
+    # Foreign keys are only checked on commit, which TestCase never reaches.
+    def test_questions_of_an_invoice_deleted_elsewhere_are_not_found(self):
+        invoice = Invoice.objects.create(
+            plan=Plan.objects.create(name="basic", price=10), amount=10
+        )
+        resolve_invoice(invoice.uid)
+        invoice.delete()
+        utils._remember_invoice(invoice)
+
+        client = Client(HTTP_HOST="hrdio.vercel.app")
+        response = client.get(f"/analysis/questions/{invoice.uid}")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertIsNone(cached(invoice))
+        self.assertFalse(Assessment.objects.exists())
@@ -0,0 +1,58 @@
+from django.db.models import Count
+
+from analysis.models import Answer, FunctionResponseCount
+
+from .base import CatalogTestCase
+
+
+class RespondentCounterTests(CatalogTestCase):
+    def test_counters_match_answer_rows(self):
+        invoice = self.new_invoice()
+        self.respond(invoice)
+        self.respond(invoice, lambda index: 5 if index % 2 else 1)
+
+        live = {
+            (function_id, response): count
+            for function_id, response, count in Answer.objects.filter(invoice=invoice)
+            .order_by()
+            .values_list("question__function_id", "response")
+            .annotate(count=Count("id"))
+        }
+        counters = {
+            (function_id, response): count
+            for function_id, response, count in FunctionResponseCount.objects.filter(
+                invoice=invoice, count__gt=0
+            ).values_list("function_id", "response", "count")
+        }
+        self.assertEqual(counters, live)
+        self.assertEqual(
+            self.results(invoice)["overall"]["total_answers"],
+            Answer.objects.filter(invoice=invoice).count(),
+        )
+
+    def test_respondent_resubmission_is_rejected(self):
+        invoice = self.new_invoice()
+        uid = self.client.post(f"/analysis/respondents/{invoice.uid}").json()["uid"]
+        payload = [{"question_id": self.question_ids()[0], "answer_id": 3}]
+        self.client.post(f"/analysis/respond/{uid}", payload, content_type="application/json")
+        counters = list(FunctionResponseCount.objects.values_list("count", "weight"))
+
+        response = self.client.post(
+            f"/analysis/respond/{uid}", payload, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            list(FunctionResponseCount.objects.values_list("count", "weight")), counters
+        )
+
+    def test_direct_and_respondent_answers_do_not_mix(self):
+        direct = self.new_invoice()
+        self.answer(direct)
+        self.assertEqual(
+            self.client.post(f"/analysis/respondents/{direct.uid}").status_code, 409
+        )
+
+        per_respondent = self.new_invoice()
+        self.respond(per_respondent)
+        self.assertEqual(self.answer(per_respondent).status_code, 409)
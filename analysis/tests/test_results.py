@@ -0,0 +1,66 @@
+from .base import CatalogTestCase
+
+
+class ResultFieldsTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        # Peers, so the percentiles are not all empty.
+        for response in (lambda index: 2, lambda index: 4):
+            self.answer(self.new_invoice("premium"), response)
+        self.invoice = self.new_invoice("premium")
+        self.answer(self.invoice)
+        self.full = self.results(self.invoice)
+        self.assertGreater(len(self.full["functions"]), 3)
+        self.assertIsNotNone(self.full["overall"]["percentile"])
+
+    def get(self, **params):
+        response = self.client.get(f"/analysis/result/{self.invoice.uid}", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_fields_select_from_the_full_payload(self):
+        self.assertEqual(self.get(fields="overall"), {"overall": self.full["overall"]})
+        self.assertEqual(
+            self.get(fields="functions.function_id,functions.percentile"),
+            {
+                "functions": [
+                    {
+                        "function_id": function["function_id"],
+                        "percentile": function["percentile"],
+                    }
+                    for function in self.full["functions"]
+                ]
+            },
+        )
+        self.assertEqual(
+            self.get(fields="overall.total_score,functions"),
+            {
+                "functions": self.full["functions"],
+                "overall": {"total_score": self.full["overall"]["total_score"]},
+            },
+        )
+
+    def test_function_filter_selects_from_the_full_payload(self):
+        function_ids = [
+            function["function_id"] for function in self.full["functions"][1:3]
+        ]
+
+        results = self.get(
+            fields="functions", function=",".join(map(str, function_ids))
+        )
+
+        self.assertEqual(
+            results["functions"],
+            [
+                function
+                for function in self.full["functions"]
+                if function["function_id"] in function_ids
+            ],
+        )
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(
+            f"/analysis/result/{self.invoice.uid}", {"fields": "overall.nope"}
+        )
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,73 @@
+import json
+
+from django.contrib.auth.models import User
+
+from analysis.models import Plan, Question, ScoringModel
+
+from .base import CatalogTestCase
+
+
+class ScoringModelAdminTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "secret")
+        )
+        self.plan = Plan.objects.get(name="basic")
+        self.model = ScoringModel.objects.create(
+            plan=self.plan,
+            scores={"1": 0, "2": 25, "3": 50, "4": 75, "5": 100},
+            sentiments={"1": "negative", "3": "neutral", "5": "positive"},
+            sentiment_order=["negative", "neutral", "positive"],
+        )
+
+    def edit(self, **changes):
+        current = ScoringModel.objects.get(id=self.model.id)
+        data = {"plan": self.plan.id, "is_active": "on"}
+        for field in ("scores", "sentiments", "sentiment_order"):
+            # The change form posts JSON fields with their hidden initial value.
+            data[field] = data[f"initial-{field}"] = json.dumps(getattr(current, field))
+        data.update(changes)
+        data = {key: value for key, value in data.items() if value is not None}
+        response = self.client.post(
+            f"/admin/analysis/scoringmodel/{self.model.id}/change/", data
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def versions(self):
+        return list(
+            ScoringModel.objects.filter(plan=self.plan)
+            .order_by("version")
+            .values_list("version", "is_active")
+        )
+
+    def test_deactivating_keeps_the_version(self):
+        self.edit(is_active=None)
+        self.assertEqual(self.versions(), [(1, False)])
+
+        self.edit()
+        self.assertEqual(self.versions(), [(1, True)])
+
+    def test_score_edit_creates_an_active_version(self):
+        self.edit(scores=json.dumps({"1": 0, "2": 20, "3": 40, "4": 80, "5": 100}))
+
+        self.assertEqual(self.versions(), [(1, False), (2, True)])
+        self.assertEqual(
+            ScoringModel.objects.get(plan=self.plan, version=2).scores["2"], 20
+        )
+
+    def test_priority_edits_are_snapshotted_into_a_new_version(self):
+        self.edit()
+        self.assertEqual(self.versions(), [(1, True)])
+
+        question = Question.objects.first()
+        Question.objects.filter(id=question.id).update(priority=question.priority + 1)
+        self.edit()
+
+        self.assertEqual(self.versions(), [(1, False), (2, True)])
+        self.assertEqual(
+            ScoringModel.objects.get(plan=self.plan, version=2).priorities[
+                str(question.id)
+            ],
+            question.priority + 1,
+        )
@@ -0,0 +1,22 @@
+from django.contrib.auth.models import User
+
+from .base import CatalogTestCase
+
+
+class QuestionSearchTests(CatalogTestCase):
+    def search(self, **params):
+        return self.client.get("/analysis/questions/search", params)
+
+    def test_requires_a_staff_session(self):
+        self.assertEqual(self.search(q="a").status_code, 403)
+
+        self.client.force_login(User.objects.create_user("editor"))
+        self.assertEqual(self.search(q="a").status_code, 403)
+
+    def test_staff_session_searches_the_catalog(self):
+        self.client.force_login(User.objects.create_user("editor", is_staff=True))
+
+        response = self.search(q="a", limit=0)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
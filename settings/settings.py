@@ -34,6 +34,7 @@ CORS_ALLOW_METHODS = [
 
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_HEADERS = ["Authorization", "Content-Type", "Accept"]
+CORS_EXPOSE_HEADERS = ["X-Catalog-Version"]
 CORS_ALLOW_CREDENTIALS = True
 
 INSTALLED_APPS = [
@@ -42,9 +43,11 @@ INSTALLED_APPS = [
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
+    # Before staticfiles, so its collectstatic (which writes the question
+    # bundles first) takes precedence.
+    "analysis",
     "django.contrib.staticfiles",
     "rest_framework",
-    "analysis",
 ]
 
 SESSION_ENGINE = "django.contrib.sessions.backends.db"
@@ -67,8 +70,20 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "analysis.middleware.RequestProfilingMiddleware",
 ]
 
+# Request profiling (see analysis/middleware.py). Off by default; when enabled,
+# requests are profiled if they send a token from `manage.py profiling_token`
+# or fall into the sample rate.
+PROFILING_ENABLED = env.bool("PROFILING_ENABLED", default=False)
+PROFILING_SAMPLE_RATE = env.float("PROFILING_SAMPLE_RATE", default=0.0)
+PROFILING_PATH_PREFIXES = ["/analysis/result/", "/analysis/export/"]
+PROFILING_TOKEN_MAX_AGE = 3600
+# Outside MEDIA_ROOT: profiles hold SQL parameters and are only downloadable
+# by staff through the admin.
+PROFILING_ROOT = env.str("PROFILING_ROOT", default=str(BASE_DIR / "profiles"))
+
 ROOT_URLCONF = "settings.urls"
 
 TEMPLATES = [
@@ -137,6 +152,12 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
 
 if DEBUG == False:
     STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+    # Django 5.1+ only reads STORAGES; hashed names let WhiteNoise serve the
+    # questionnaire bundles (and admin assets) as immutable.
+    STORAGES = {
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": STATICFILES_STORAGE},
+    }
     WHITENOISE_MANIFEST_STRICT = False
     django_heroku.settings(locals())
 